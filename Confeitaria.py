@@ -4,7 +4,7 @@
 # Requisitos:
 #   pip install PyQt6
 #   # (opcional)
-#   pip install PyQt6-Charts qtawesome matplotlib reportlab bcrypt pyyaml
+#   pip install PyQt6-Charts qtawesome matplotlib reportlab bcrypt pyyaml orjson
 #   pip install openpyxl
 #
 # Observações:
@@ -34,19 +34,34 @@
 from __future__ import annotations
 
 import os
+import re
+import queue
+import shutil
+import signal
+import stat
+import subprocess
 import sys
 import sqlite3
 import hashlib
 import json
+import logging
+import struct
 import urllib.request
 import urllib.error
 import ctypes
+import functools
 import threading
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
 from typing import Optional, Any, Callable, TypeVar, Protocol, Sequence, cast
 from datetime import datetime, date, timedelta, timezone
 
 T = TypeVar("T")
 
+# Logger do módulo: segue a configuração de core/logger.py (arquivo diário em AppData)
+logger = logging.getLogger(__name__)
+
 # ---------------------------------------------------------------------
 # LICENÇA — Configurações e cache local
 # ---------------------------------------------------------------------
@@ -67,12 +82,15 @@ DEBUG_LICENSE = False  # coloque True para logs de diagnóstico
 DEVELOPMENT_MODE = False  # True para desenvolvimento, False para produção
 VALID_TOKENS = ["TYVC-7WE5-9ETH-HJGS", "EAT8-M8ES-BVMC-FEY2", "4N36-EX3N-2HEZ-H7BJ"]  # Tokens válidos do sistema
 
-from PyQt6.QtCore import Qt, QSize, QTimer, QEasingCurve, QPropertyAnimation, QPoint, QDate, QThread, pyqtSignal
-from PyQt6.QtGui import QAction, QIcon, QColor, QFont
+from PyQt6.QtCore import (
+    Qt, QSize, QTimer, QEasingCurve, QPropertyAnimation, QPoint, QDate, QThread, pyqtSignal,
+    QAbstractTableModel, QModelIndex, QEvent, QEventLoop
+)
+from PyQt6.QtGui import QAction, QIcon, QColor, QFont, QBrush, QPixmap, QPainter
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QPushButton, QListWidget, QListWidgetItem, QStackedWidget, QTableWidget,
-    QTableWidgetItem, QAbstractItemView, QFormLayout, QLineEdit, QSpinBox,
+    QTableWidgetItem, QTableView, QAbstractItemView, QFormLayout, QLineEdit, QSpinBox,
     QDoubleSpinBox, QComboBox, QDateEdit, QTextEdit, QDialog, QDialogButtonBox,
     QFrame, QGraphicsDropShadowEffect, QHeaderView, QTabWidget, QFileDialog, QMessageBox,
     QMenu, QInputDialog, QColorDialog, QSizePolicy, QProgressDialog, QScrollArea, QCheckBox, QGroupBox, QProgressBar
@@ -113,12 +131,17 @@ except Exception:
     class Database:
         def __init__(self, path: str) -> None:
             # Conexão com PRAGMAs para melhor concorrência quando usando fallback local
-            self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            # (mesmos do core: WAL local / TRUNCATE na rede + synchronous=NORMAL)
+            self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, cached_statements=256)
             self.conn.row_factory = sqlite3.Row
             try:
                 cur = self.conn.cursor()
                 cur.execute("PRAGMA foreign_keys=ON")
-                cur.execute("PRAGMA journal_mode=WAL")
+                # is_network_path é definido mais abaixo no módulo (resolvido na chamada)
+                if is_network_path(path):
+                    cur.execute("PRAGMA journal_mode=TRUNCATE")
+                else:
+                    cur.execute("PRAGMA journal_mode=WAL")
                 cur.execute("PRAGMA synchronous=NORMAL")
                 cur.execute("PRAGMA busy_timeout=30000")
                 cur.execute("PRAGMA temp_store=MEMORY")
@@ -154,27 +177,53 @@ DB = Database  # alias p/ typing local
 # NETWORK PATH DETECTION & ASYNC VALIDATION
 # ---------------------------------------------------------------------
 
-def is_network_path(path: str) -> bool:
-    """Detecta se o caminho é uma unidade de rede (UNC ou mapeada)."""
-    if not path:
-        return False
-    
-    # UNC path (\\servidor\compartilhamento)
-    if path.startswith('\\\\') or path.startswith('//'):
-        return True
+_UNC_PREFIX = "\\\\"  # \\servidor\compartilhamento
+_DB_EXT = ".db"
+_SQLITE_MAGIC = b"SQLite format 3\x00"  # 16 primeiros bytes de todo banco SQLite
+# \\servidor\compartilhamento\[pastas\]arquivo.db
+_UNC_DB_RE = re.compile(r"^\\\\[^\\]+\\[^\\]+\\.+\.db$", re.IGNORECASE)
+
+# Teste de caminho de rede compartilhado com core.config/core.database
+# (journal_mode TRUNCATE na rede, WAL local); cópia local só sem o core
+try:
+    from core.database import drive_is_remote as _drive_is_remote, is_network_path
+except Exception:
+    _DRIVE_REMOTE = 4  # GetDriveTypeW: unidade de rede
     
-    # Verificar se é unidade mapeada (Windows)
-    if sys.platform == 'win32' and len(path) >= 2 and path[1] == ':':
+    def _drive_is_remote(drive_letter: str) -> Optional[bool]:
+        """GetDriveTypeW da letra (Windows): True se for unidade de rede; None se indisponível"""
+        if sys.platform != 'win32':
+            return None
         try:
-            import subprocess
-            drive_letter = path[0].upper()
-            result = subprocess.run(['net', 'use'], capture_output=True, text=True, timeout=2)
-            if result.returncode == 0 and drive_letter in result.stdout:
-                return True
+            return ctypes.windll.kernel32.GetDriveTypeW(f"{drive_letter.upper()}:\\") == _DRIVE_REMOTE
         except Exception:
-            pass
+            return None
     
-    return False
+    def is_network_path(path: str) -> bool:
+        """Detecta se o caminho é uma unidade de rede (UNC ou mapeada)."""
+        if not path:
+            return False
+        
+        # UNC path (\\servidor\compartilhamento)
+        if path.startswith((_UNC_PREFIX, '//')):
+            return True
+        
+        # Verificar se é unidade mapeada (Windows)
+        if sys.platform == 'win32' and len(path) >= 2 and path[1] == ':':
+            # Chamada direta à API; "net use" só se ela falhar
+            remote = _drive_is_remote(path[0])
+            if remote is not None:
+                return remote
+            try:
+                import subprocess
+                drive_letter = path[0].upper()
+                result = subprocess.run(['net', 'use'], capture_output=True, text=True, timeout=2)
+                if result.returncode == 0 and drive_letter in result.stdout:
+                    return True
+            except Exception:
+                pass
+        
+        return False
 
 class AsyncDatabaseValidator(QThread):
     """Thread para validar banco de dados de forma assíncrona (evita travar UI)."""
@@ -787,6 +836,12 @@ except Exception:
         """Retorna ícone vazio quando QtAwesome não disponível"""
         return QIcon()
 
+# JSON: usa orjson se disponível (serialização bem mais rápida), senão json da stdlib
+try:
+    import orjson  # type: ignore
+except Exception:
+    orjson = None
+
 # Senha: usa bcrypt se disponível, senão sha256 como fallback (marcado com prefixo)
 try:
     import bcrypt  # type: ignore
@@ -969,6 +1024,21 @@ def show_message(
 # -----------------------------
 # Database helpers
 # -----------------------------
+
+# Tabelas cujo total de linhas é mantido por triggers em _counts (status do banco)
+_COUNTED_TABLES = ("customers", "products", "orders")
+
+
+# Status do banco: journal mode + totais em uma só consulta
+_SQL_DB_STATUS_COUNTED = "SELECT (SELECT journal_mode FROM pragma_journal_mode()), " + ", ".join(
+    f"COALESCE((SELECT n FROM _counts WHERE table_name = '{t}'), (SELECT COUNT(*) FROM {t}))"
+    for t in _COUNTED_TABLES
+)
+_SQL_DB_STATUS_SCAN = "SELECT (SELECT journal_mode FROM pragma_journal_mode()), " + ", ".join(
+    f"(SELECT COUNT(*) FROM {t})" for t in _COUNTED_TABLES
+)
+
+
 class ExtendedDatabase(Database):
     """Extende core Database com schema do app."""
     def _init_db(self) -> None:
@@ -1213,11 +1283,52 @@ class ExtendedDatabase(Database):
                 quantity INTEGER NOT NULL DEFAULT 1,
                 size TEXT,
                 notes TEXT,
-                created_at TEXT NOT NULL,
+                created_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
                 FOREIGN KEY (product_id) REFERENCES products (id) ON DELETE CASCADE
             )
         """)
         
+        # Índice para a consulta de estoque x encomendas do dia (Produção, auto-refresh)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS ix_orders_prod_delivery_status
+            ON orders (product_id, delivery_date, status)
+        """)
+        
+        # Índices cobrindo os agregados mensais (Relatórios/Dashboard): SUM(total) e
+        # COUNT(*) por mês/status respondidos só pelo índice, sem ler as linhas
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name='ix_orders_status_created'")
+        new_indexes = cur.fetchone() is None
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS ix_orders_status_created
+            ON orders (status, created_at, total)
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS ix_orders_created_status
+            ON orders (created_at, status, total)
+        """)
+        if new_indexes:
+            # Estatísticas para o planner escolher os índices novos (só na criação)
+            cur.execute("ANALYZE orders")
+        
+        # Contagem de linhas mantida por triggers (evita COUNT(*) no status do banco)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS _counts (
+                table_name TEXT PRIMARY KEY,
+                n INTEGER NOT NULL
+            )
+        """)
+        for table in _COUNTED_TABLES:
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS _counts_{table}_ai AFTER INSERT ON {table}
+                BEGIN UPDATE _counts SET n = n + 1 WHERE table_name = '{table}'; END
+            """)
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS _counts_{table}_ad AFTER DELETE ON {table}
+                BEGIN UPDATE _counts SET n = n - 1 WHERE table_name = '{table}'; END
+            """)
+            # Semeia só na primeira vez; depois os triggers mantêm o valor
+            cur.execute(f"INSERT OR IGNORE INTO _counts (table_name, n) SELECT '{table}', COUNT(*) FROM {table}")
+        
         self.conn.commit()
         
         # Adiciona etiquetas padrão se não existirem
@@ -1323,9 +1434,12 @@ def check_and_reserve_stock(db: Any) -> int:
 def money(v: float) -> str:
     return f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
+@functools.lru_cache(maxsize=512)
 def format_size(size_str: Optional[str]) -> str:
     """Formata tamanho(s) adicionando 'cm' após cada valor.
     
+    Memoizado: os tamanhos se repetem muito e a função é chamada a cada refresh/pintura.
+    
     Exemplos:
         "30" -> "30 cm"
         "15, 20, 25" -> "15 cm, 20 cm, 25 cm"
@@ -1340,6 +1454,9 @@ def format_size(size_str: Optional[str]) -> str:
     formatted = [f"{s} cm" if not s.endswith(" cm") and not s.endswith("cm") else s for s in sizes]
     return ", ".join(formatted)
 
+# YYYY-MM-DD[ HH:MM[:SS]] como gravado no banco (fatiado sem passar pelo strptime)
+_ISO_DATETIME_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})(?: (\d{2}):(\d{2})(?::(\d{2}))?)?")
+
 def format_date(date_str: str) -> str:
     """Converte data do formato YYYY-MM-DD para DD/MM/YYYY"""
     if not date_str:
@@ -1348,6 +1465,12 @@ def format_date(date_str: str) -> str:
         # Se já estiver no formato DD/MM/YYYY, retorna como está
         if "/" in date_str:
             return date_str
+        # Caminho rápido: YYYY-MM-DD exato; date() só valida os números
+        m = _ISO_DATETIME_RE.fullmatch(date_str)
+        if m and m.group(4) is None:
+            y, mo, d = m.group(1, 2, 3)
+            date(int(y), int(mo), int(d))
+            return f"{d}/{mo}/{y}"
         # Converte de YYYY-MM-DD para DD/MM/YYYY
         d = datetime.strptime(date_str, "%Y-%m-%d")
         return d.strftime("%d/%m/%Y")
@@ -1366,6 +1489,12 @@ def format_datetime(dt_str: str) -> str:
         # Já no padrão brasileiro?
         if "/" in s and (" " in s or len(s) == 10):
             return s
+        # Caminho rápido: formato gravado pelo sistema; datetime() só valida os números
+        m = _ISO_DATETIME_RE.fullmatch(s)
+        if m:
+            y, mo, d, hh, mi, ss = m.groups()
+            datetime(int(y), int(mo), int(d), int(hh or 0), int(mi or 0), int(ss or 0))
+            return f"{d}/{mo}/{y} {hh}:{mi}" if hh else f"{d}/{mo}/{y}"
         # Tenta com segundos
         try:
             d = datetime.strptime(s, "%Y-%m-%d %H:%M:%S")
@@ -3916,6 +4045,344 @@ class ReadyStockPage(BasePage):
                     self.toast_cb(f"Erro ao atualizar produto: {str(e)}")
 
 
+_DIGEST_INT = struct.Struct("<cq")
+_DIGEST_LEN = struct.Struct("<cI")
+
+
+def _rows_digest(rows: Sequence[Any], columns: Sequence[str]) -> bytes:
+    """Digest blake2b de 16 bytes das colunas das linhas, para detectar mudanças sem montar strings."""
+    h = hashlib.blake2b(digest_size=16)
+    for r in rows:
+        for col in columns:
+            value = r[col]
+            if isinstance(value, int):
+                h.update(_DIGEST_INT.pack(b"i", value))
+            else:
+                raw = b"" if value is None else str(value).encode("utf-8")
+                h.update(_DIGEST_LEN.pack(b"s", len(raw)))
+                h.update(raw)
+    return h.digest()
+
+
+class _KeyedRowsModel(QAbstractTableModel):
+    """Base dos modelos de tabela com linhas em tuplas cuja 1ª posição é o id.
+
+    `_apply_rows` compara com as linhas exibidas e só insere/remove/atualiza o que mudou,
+    evitando reset completo (e flicker) a cada auto-refresh.
+
+    Com FETCH_BATCH > 0 só as primeiras linhas ficam expostas à view; as demais são
+    entregues em lotes via canFetchMore/fetchMore conforme o usuário rola a tabela.
+    """
+    HEADERS: tuple[str, ...] = ()
+    FETCH_BATCH = 0
+
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self._rows: list[tuple] = []
+        self._key_index: Optional[dict[Any, int]] = None  # id -> linha (reconstruído sob demanda)
+        self._loaded = self.FETCH_BATCH  # Linhas já expostas à view (modo sob demanda)
+
+    def _index_of(self, key: Any) -> int:
+        """Linha do id informado, ou -1."""
+        if self._key_index is None:
+            self._key_index = {r[0]: i for i, r in enumerate(self._rows)}
+        return self._key_index.get(key, -1)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        if self.FETCH_BATCH:
+            return min(self._loaded, len(self._rows))
+        return len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        return not parent.isValid() and self.rowCount() < len(self._rows)
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        if parent.isValid():
+            return
+        start = self.rowCount()
+        end = min(len(self._rows), start + self.FETCH_BATCH) - 1
+        if end < start:
+            return
+        self.beginInsertRows(QModelIndex(), start, end)
+        self._loaded = end + 1
+        self.endInsertRows()
+
+    def _apply_partial_rows(self, new_rows: list[tuple]) -> None:
+        """Sincroniza quando nem todas as linhas estão expostas (modo sob demanda)."""
+        if [r[0] for r in self._rows] != [r[0] for r in new_rows]:
+            # Estrutura mudou: reset mantendo o quanto o usuário já tinha rolado
+            self.beginResetModel()
+            self._rows = new_rows
+            self._loaded = max(self.FETCH_BATCH, min(self._loaded, len(new_rows)))
+            self.endResetModel()
+            return
+        visible = self.rowCount()
+        changed = [i for i, (old, new) in enumerate(zip(self._rows, new_rows)) if old != new]
+        self._rows = new_rows
+        last_col = self.columnCount() - 1
+        for i in changed:
+            if i < visible:
+                self.dataChanged.emit(self.index(i, 0), self.index(i, last_col))
+
+    def _apply_rows(self, new_rows: list[tuple]) -> None:
+        self._key_index = None
+        if self.FETCH_BATCH and max(len(self._rows), len(new_rows)) > self._loaded:
+            self._apply_partial_rows(new_rows)
+            return
+        old_keys = [r[0] for r in self._rows]
+        new_keys = [r[0] for r in new_rows]
+        old_set, new_set = set(old_keys), set(new_keys)
+        # Se os itens que permanecem mudaram de ordem, o diff não compensa
+        if [k for k in old_keys if k in new_set] != [k for k in new_keys if k in old_set]:
+            self.beginResetModel()
+            self._rows = new_rows
+            self.endResetModel()
+            return
+
+        # Remove (de trás para frente para preservar os índices)
+        for i in range(len(self._rows) - 1, -1, -1):
+            if self._rows[i][0] not in new_set:
+                self.beginRemoveRows(QModelIndex(), i, i)
+                del self._rows[i]
+                self.endRemoveRows()
+
+        # Insere os novos e atualiza apenas as linhas alteradas
+        last_col = self.columnCount() - 1
+        for i, row in enumerate(new_rows):
+            if i >= len(self._rows) or self._rows[i][0] != row[0]:
+                self.beginInsertRows(QModelIndex(), i, i)
+                self._rows.insert(i, row)
+                self.endInsertRows()
+            elif self._rows[i] != row:
+                self._rows[i] = row
+                self.dataChanged.emit(self.index(i, 0), self.index(i, last_col))
+                self.headerDataChanged.emit(Qt.Orientation.Vertical, i, i)
+
+
+class ProductionModel(_KeyedRowsModel):
+    """Modelo da lista de produção (sem um QTableWidgetItem por célula a cada refresh).
+
+    Cada linha é a tupla (id, product_id, nome, quantidade, tamanho bruto, observações).
+    Edições passam por `edit_cb(row, col, texto)`, que grava no banco e retorna se aceitou.
+    """
+    HEADERS = ("Produto", "Qtd", "Tamanho", "Obs")
+
+    def __init__(self, edit_cb: Optional[Callable[[int, int, str], bool]] = None,
+                 parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self._edit_cb = edit_cb
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        _item_id, _product_id, name, quantity, size, notes = self._rows[index.row()]
+        col = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return (name, str(quantity), format_size(size), notes)[col]
+        if role == Qt.ItemDataRole.EditRole:
+            # Tamanho é editado no formato bruto ("15, 20"), sem o sufixo "cm"
+            return (name, str(quantity), size, notes)[col]
+        if role == Qt.ItemDataRole.TextAlignmentRole and col in (1, 2):
+            return Qt.AlignmentFlag.AlignCenter
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        flags = super().flags(index)
+        if index.isValid() and index.column() > 0:
+            flags |= Qt.ItemFlag.ItemIsEditable  # Qtd, Tamanho e Obs editáveis
+        return flags
+
+    def setData(self, index: QModelIndex, value: Any, role: int = Qt.ItemDataRole.EditRole) -> bool:
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole or index.column() == 0:
+            return False
+        text = str(value).strip()
+        if self._edit_cb is not None and not self._edit_cb(index.row(), index.column(), text):
+            return False  # Mantém o valor anterior na view
+        row = list(self._rows[index.row()])
+        row[index.column() + 2] = int(text) if index.column() == 1 else text
+        self._rows[index.row()] = tuple(row)
+        self.dataChanged.emit(index, index)
+        return True
+
+    def set_rows(self, rows: Sequence[Any]) -> None:
+        """Sincroniza com as linhas do banco, atualizando só o que mudou."""
+        self._apply_rows([
+            (r["id"], r["product_id"], r["name"], r["quantity"], r["size"] or "", r["notes"] or "")
+            for r in rows
+        ])
+
+    def item_ids(self, row: int) -> tuple[int, int]:
+        """Retorna (id do production_item, product_id) da linha."""
+        return self._rows[row][0], self._rows[row][1]
+
+    def item_name(self, row: int) -> str:
+        return str(self._rows[row][2])
+
+
+class StockModel(_KeyedRowsModel):
+    """Modelo da tabela de estoque: nome no header vertical, colunas Qtd e Encomendas.
+
+    Cada linha é a tupla (product_id, nome, estoque, total de encomendas).
+    """
+    HEADERS = ("Qtd", "Encomendas")
+    FETCH_BATCH = 100  # Catálogos grandes: materializa 100 linhas por vez
+
+    # Estilos compartilhados por todas as células (QBrush/QFont são implicitamente compartilhados)
+    _RED_BG = QBrush(QColor(255, 102, 102))     # Vermelho claro: estoque zerado/negativo
+    _YELLOW_BG = QBrush(QColor(255, 193, 7))    # Amarelo: estoque baixo
+    _WHITE_FG = QBrush(QColor(255, 255, 255))
+    _BLACK_FG = QBrush(QColor(0, 0, 0))
+    _LOW_FONT = QFont("Arial", 10, QFont.Weight.Bold)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role == Qt.ItemDataRole.DisplayRole:
+            if orientation == Qt.Orientation.Horizontal:
+                return self.HEADERS[section]
+            return str(self._rows[section][1])  # Nome do produto
+        return super().headerData(section, orientation, role)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        _product_id, _name, stock, total_orders = self._rows[index.row()]
+        col = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return str(stock) if col == 0 else str(int(total_orders))
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignCenter
+        if col != 0 or stock >= 5:
+            return None
+        # Destaca estoque zerado/negativo (vermelho) ou baixo, menos de 5 (amarelo)
+        if role == Qt.ItemDataRole.BackgroundRole:
+            return self._RED_BG if stock <= 0 else self._YELLOW_BG
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return self._WHITE_FG if stock <= 0 else self._BLACK_FG
+        if role == Qt.ItemDataRole.FontRole and stock <= 0:
+            return self._LOW_FONT
+        return None
+
+    def set_rows(self, rows: Sequence[Any]) -> None:
+        """Sincroniza com as linhas do banco, atualizando só o que mudou."""
+        self._apply_rows([(r["id"], r["name"], r["stock"], r["total_orders"]) for r in rows])
+
+    @staticmethod
+    def _stock_band(stock: int) -> int:
+        """Faixa usada na ordenação da consulta: zerado, baixo (<5) ou normal."""
+        return 0 if stock <= 0 else 1 if stock < 5 else 2
+
+    def update_stock(self, product_id: int, stock: int) -> bool:
+        """Atualiza só a linha do produto; retorna False se ela não está visível ou mudaria de posição."""
+        row = self._index_of(product_id)
+        if row < 0:
+            return False
+        pid, name, old_stock, total_orders = self._rows[row]
+        if self._stock_band(old_stock) != self._stock_band(stock):
+            return False
+        self._rows[row] = (pid, name, stock, total_orders)
+        if row < self.rowCount():
+            self.dataChanged.emit(self.index(row, 0), self.index(row, 0))
+        return True
+
+
+# Consultas da página de Produção (auto-refresh a cada 2s). Strings constantes
+# reaproveitam o cache de statements preparados da conexão sqlite3. O filtro do dia
+# é um intervalo [dia, dia seguinte) para usar o índice ix_orders_prod_delivery_status
+# (DATE(o.delivery_date) = ? impediria o uso do índice).
+_SQL_PRODUCTION_DIGEST = """
+    SELECT pi.id, p.name, pi.quantity, pi.size
+    FROM production_items pi
+    JOIN products p ON p.id = pi.product_id
+    ORDER BY pi.created_at DESC
+"""
+
+_SQL_PRODUCTION_ITEMS = """
+    SELECT pi.id, p.id as product_id, p.name, pi.quantity, pi.size, pi.notes
+    FROM production_items pi
+    JOIN products p ON p.id = pi.product_id
+    ORDER BY pi.created_at DESC
+"""
+
+_SQL_STOCK_BY_DATE = """
+    SELECT p.id, p.name, p.stock,
+           COALESCE(SUM(o.quantity), 0) as total_orders
+    FROM products p
+    LEFT JOIN orders o ON o.product_id = p.id
+                      AND o.status != 'Entregue'
+                      AND o.delivery_date >= ? AND o.delivery_date < ?
+    GROUP BY p.id, p.name, p.stock
+    ORDER BY
+      CASE WHEN p.stock <= 0 THEN 0 WHEN p.stock < 5 THEN 1 ELSE 2 END,
+      p.name
+"""
+
+# Aplica ao estoque a diferença de quantidade de um item da produção (só se mudou)
+# e devolve o novo estoque; a quantidade antiga é lida antes do UPDATE do item.
+_SQL_APPLY_PRODUCTION_QTY = """
+    UPDATE products
+    SET stock = stock + (:qty - (SELECT quantity FROM production_items WHERE id = :item))
+    WHERE id = (SELECT product_id FROM production_items WHERE id = :item)
+      AND (SELECT quantity FROM production_items WHERE id = :item) != :qty
+    RETURNING id, stock, :qty - (SELECT quantity FROM production_items WHERE id = :item) AS diff
+"""
+
+# created_at em horário local no mesmo formato de datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+_SQL_INSERT_PRODUCTION_ITEM = """
+    INSERT INTO production_items (product_id, quantity, size, notes, created_at)
+    VALUES (?, ?, ?, ?, datetime('now', 'localtime'))
+"""
+
+_SQL_STOCK_BY_DATE_SEARCH = """
+    SELECT p.id, p.name, p.stock,
+           COALESCE(SUM(o.quantity), 0) as total_orders
+    FROM products p
+    LEFT JOIN orders o ON o.product_id = p.id
+                      AND o.status != 'Entregue'
+                      AND o.delivery_date >= ? AND o.delivery_date < ?
+    WHERE p.name LIKE ?
+    GROUP BY p.id, p.name, p.stock
+    ORDER BY
+      CASE WHEN p.stock <= 0 THEN 0 WHEN p.stock < 5 THEN 1 ELSE 2 END,
+      p.name
+"""
+
+
+class ProductionListWriter(QThread):
+    """Grava o JSON da lista de produção (painel da cozinha) sem bloquear a UI."""
+    written = pyqtSignal(bool, str)  # (sucesso, nº de itens ou mensagem de erro)
+
+    def __init__(self, json_path: str, data: dict) -> None:
+        super().__init__()
+        self.json_path = json_path
+        self.data = data
+
+    def run(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.json_path), exist_ok=True)
+            # JSON compacto (o painel web só faz parse); orjson quando disponível
+            if orjson is not None:
+                payload = orjson.dumps(self.data)
+            else:
+                payload = json.dumps(self.data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            # Grava em arquivo temporário e troca de uma vez: o painel web nunca lê meio arquivo
+            tmp_path = self.json_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.json_path)
+            self.written.emit(True, str(len(self.data["items"])))
+        except Exception as e:
+            self.written.emit(False, str(e))
+
+
 class ProductionPage(BasePage):
     """Página de Produção - Lista de produção editável com atualização automática"""
     def __init__(self, db: DB, toast_cb: Optional[Callable[[str], None]] = None) -> None:
@@ -3924,8 +4391,14 @@ class ProductionPage(BasePage):
         self.toast_cb = toast_cb
         
         # Cache para detectar mudanças
-        self._last_production_hash = ""
-        self._last_stock_hash = ""
+        self._last_production_hash = b""
+        self._last_stock_hash = b""
+        # Marcador barato de escrita no banco: (total_changes desta conexão, data_version)
+        self._last_change_token: tuple[int, int] = (-1, -1)
+        self._last_selected_date = ""
+        
+        # Janela de topo observada por eventFilter (minimizar/foco; ver _watch_window)
+        self._watched_window: Optional[QWidget] = None
         
         # Timer para auto-refresh (a cada 2 segundos)
         self.refresh_timer = QTimer()
@@ -4043,8 +4516,11 @@ class ProductionPage(BasePage):
         header_box.addStretch(1)
         left_layout.addLayout(header_box)
         
-        self.production_table = QTableWidget(0, 4)
-        self.production_table.setHorizontalHeaderLabels(["Produto", "Qtd", "Tamanho", "Obs"])
+        # Edições de célula chegam via ProductionModel.setData -> _on_production_item_changed
+        self.production_model = ProductionModel(self._on_production_item_changed, self)
+        self.production_table = QTableView()
+        self.production_table.setObjectName("DataTable")
+        self.production_table.setModel(self.production_model)
         self.production_table.setAlternatingRowColors(True)
         self.production_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         if header := self.production_table.horizontalHeader():
@@ -4053,9 +4529,6 @@ class ProductionPage(BasePage):
             header.setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)  # Tamanho
             header.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)  # Obs estica
         
-        # Conectar sinal de edição de célula
-        cast(Any, self.production_table.itemChanged).connect(self._on_production_item_changed)
-        
         left_layout.addWidget(self.production_table)
         
         # Botão para remover item selecionado
@@ -4083,12 +4556,19 @@ class ProductionPage(BasePage):
         self.search_stock_edit = QLineEdit()
         self.search_stock_edit.setPlaceholderText("Produto...")
         self.search_stock_edit.setClearButtonEnabled(True)
-        cast(Any, self.search_stock_edit.textChanged).connect(lambda _t: self._refresh_stock_table())
+        # Debounce: uma consulta quando a digitação pausa, não uma por tecla
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(150)
+        self._search_timer.timeout.connect(self._refresh_stock_table)
+        cast(Any, self.search_stock_edit.textChanged).connect(lambda _t: self._search_timer.start())
         search_stock_box.addWidget(self.search_stock_edit, 1)
         right_layout.addLayout(search_stock_box)
         
-        self.stock_table = QTableWidget(0, 2)
-        self.stock_table.setHorizontalHeaderLabels(["Qtd", "Encomendas"])
+        self.stock_model = StockModel(self)
+        self.stock_table = QTableView()
+        self.stock_table.setObjectName("DataTable")
+        self.stock_table.setModel(self.stock_model)
         self.stock_table.setAlternatingRowColors(True)
         self.stock_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         if header2 := self.stock_table.horizontalHeader():
@@ -4111,32 +4591,23 @@ class ProductionPage(BasePage):
     
     def _auto_refresh(self) -> None:
         """Auto-refresh com detecção de mudanças para evitar flickering"""
+        # Sem escrita no banco e mesma data: nada a consultar neste tick
+        selected_date = self.production_date.date().toString("yyyy-MM-dd")
+        change_token = self._db_change_token()
+        if change_token == self._last_change_token and selected_date == self._last_selected_date:
+            return
+        self._last_change_token = change_token
+        self._last_selected_date = selected_date
+        
         # Gera hash do estado atual da produção
-        production_rows = self.db.query("""
-            SELECT pi.id, p.name, pi.quantity, pi.size
-            FROM production_items pi
-            JOIN products p ON p.id = pi.product_id
-            ORDER BY pi.created_at DESC
-        """)
+        production_rows = self.db.query(_SQL_PRODUCTION_DIGEST)
         
         # Gera hash do estado atual do estoque com encomendas da data selecionada
-        selected_date = self.production_date.date().toString("yyyy-MM-dd")
-        stock_rows = self.db.query("""
-            SELECT p.id, p.name, p.stock, 
-                   COALESCE(SUM(o.quantity), 0) as total_orders
-            FROM products p
-            LEFT JOIN orders o ON o.product_id = p.id 
-                              AND o.status != 'Entregue' 
-                              AND DATE(o.delivery_date) = ?
-            GROUP BY p.id, p.name, p.stock
-            ORDER BY 
-              CASE WHEN p.stock <= 0 THEN 0 WHEN p.stock < 5 THEN 1 ELSE 2 END,
-              p.name
-        """, (selected_date,))
-        
-        # Cria hashes simples baseados nos dados
-        production_data = str([(r["id"], r["name"], r["quantity"], r["size"]) for r in production_rows])
-        stock_data = str([(r["id"], r["name"], r["stock"], r["total_orders"]) for r in stock_rows])
+        stock_rows = self.db.query(_SQL_STOCK_BY_DATE, self._selected_day_range())
+        
+        # Digests compactos dos dados (16 bytes cada)
+        production_data = _rows_digest(production_rows, ("id", "name", "quantity", "size"))
+        stock_data = _rows_digest(stock_rows, ("id", "name", "stock", "total_orders"))
         
         # Só atualiza se houve mudança
         if production_data != self._last_production_hash:
@@ -4147,144 +4618,94 @@ class ProductionPage(BasePage):
             self._last_stock_hash = stock_data
             self._refresh_stock_table()
     
+    def _selected_day_range(self) -> tuple[str, str]:
+        """Intervalo [dia selecionado, dia seguinte) no formato ISO usado em delivery_date"""
+        day = self.production_date.date()
+        return day.toString("yyyy-MM-dd"), day.addDays(1).toString("yyyy-MM-dd")
+    
+    def _db_change_token(self) -> tuple[int, int]:
+        """(total_changes, data_version): muda a cada escrita desta conexão ou de qualquer outra"""
+        conn = self.db.conn
+        return conn.total_changes, conn.execute("PRAGMA data_version").fetchone()[0]
+    
     def _refresh_production_table(self) -> None:
         """Atualiza a tabela de produção (lado esquerdo) - carrega do banco"""
-        # Desconecta temporariamente o sinal para evitar trigger durante refresh
-        try:
-            cast(Any, self.production_table.itemChanged).disconnect(self._on_production_item_changed)
-        except Exception:
-            pass
-        
         # Busca todos os itens da lista de produção salvos
-        rows = self.db.query("""
-            SELECT pi.id, p.id as product_id, p.name, pi.quantity, pi.size, pi.notes
-            FROM production_items pi
-            JOIN products p ON p.id = pi.product_id
-            ORDER BY pi.created_at DESC
-        """)
-        
-        self.production_table.setRowCount(0)
-        for r in rows:
-            row = self.production_table.rowCount()
-            self.production_table.insertRow(row)
-            
-            # Coluna 0: Nome do produto (não editável)
-            name_item = QTableWidgetItem(str(r["name"]))
-            name_item.setData(Qt.ItemDataRole.UserRole, r["id"])  # Armazena ID do production_item
-            name_item.setData(Qt.ItemDataRole.UserRole + 1, r["product_id"])  # Armazena product_id
-            name_item.setFlags(name_item.flags() & ~Qt.ItemFlag.ItemIsEditable)  # Não editável
-            self.production_table.setItem(row, 0, name_item)
-            
-            # Coluna 1: Quantidade (editável)
-            qty_item = QTableWidgetItem(str(r["quantity"]))
-            qty_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.production_table.setItem(row, 1, qty_item)
-            
-            # Coluna 2: Tamanho (editável)
-            size_text = format_size(str(r["size"])) if r["size"] else ""
-            size_item = QTableWidgetItem(size_text)
-            size_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            size_item.setData(Qt.ItemDataRole.UserRole, str(r["size"]))  # Armazena tamanho bruto
-            self.production_table.setItem(row, 2, size_item)
-            
-            # Coluna 3: Observações (editável)
-            notes_text = str(r["notes"]) if r["notes"] else ""
-            notes_item = QTableWidgetItem(notes_text)
-            self.production_table.setItem(row, 3, notes_item)
-        
-        # Reconecta o sinal
-        cast(Any, self.production_table.itemChanged).connect(self._on_production_item_changed)
-    
-    def _on_production_item_changed(self, item: QTableWidgetItem) -> None:
-        """Chamado quando uma célula da tabela de produção é editada"""
-        row = item.row()
-        col = item.column()
-        
+        rows = self.db.query(_SQL_PRODUCTION_ITEMS)
+        # Suspende a pintura enquanto o modelo aplica várias inserções/remoções
+        self.production_table.setUpdatesEnabled(False)
+        try:
+            self.production_model.set_rows(rows)
+        finally:
+            self.production_table.setUpdatesEnabled(True)
+    
+    def _on_production_item_changed(self, row: int, col: int, text: str) -> bool:
+        """Grava a edição de uma célula da tabela de produção; retorna False para rejeitá-la"""
         # Ignora edições na coluna de nome (não deveria acontecer)
         if col == 0:
-            return
-        
-        # Pega o ID do item da primeira coluna
-        name_item = self.production_table.item(row, 0)
-        if not name_item:
-            return
+            return False
         
-        item_id = name_item.data(Qt.ItemDataRole.UserRole)
-        product_id = name_item.data(Qt.ItemDataRole.UserRole + 1)  # product_id armazenado
+        item_id, _product_id = self.production_model.item_ids(row)
         if not item_id:
-            return
+            return False
         
         try:
             if col == 1:  # Quantidade
-                new_qty = int(item.text().strip())
+                new_qty = int(text)
                 if new_qty <= 0:
                     raise ValueError("Quantidade deve ser maior que zero")
                 
-                # Busca a quantidade antiga para calcular a diferença
-                old_qty_row = self.db.query(
-                    "SELECT quantity FROM production_items WHERE id = ?",
-                    (item_id,)
-                )
-                old_qty = int(old_qty_row[0]["quantity"]) if old_qty_row else 0
-                
-                # Atualiza a quantidade na lista de produção
-                self.db.execute(
-                    "UPDATE production_items SET quantity = ? WHERE id = ?",
-                    (new_qty, item_id)
-                )
-                
-                # Atualiza o estoque do produto com a diferença
-                quantity_change = new_qty - old_qty
-                if quantity_change != 0 and product_id:
-                    self.db.execute(
-                        "UPDATE products SET stock = stock + ? WHERE id = ?",
-                        (quantity_change, product_id)
+                # Estoque recebe a diferença e o item a nova quantidade, numa transação
+                with self.db.conn:
+                    changed = self.db.conn.execute(
+                        _SQL_APPLY_PRODUCTION_QTY, {"qty": new_qty, "item": item_id}
+                    ).fetchone()
+                    self.db.conn.execute(
+                        "UPDATE production_items SET quantity = ? WHERE id = ?",
+                        (new_qty, item_id)
                     )
-                    
+                
+                if changed:
+                    quantity_change = int(changed["diff"])
                     if self.toast_cb:
                         self.toast_cb(f"Quantidade atualizada: {new_qty} (estoque {quantity_change:+d})")
                     
-                    # Atualiza a tabela de estoque
-                    self._refresh_stock_table()
+                    # Atualiza só a linha do produto na tabela de estoque
+                    if not self.stock_model.update_stock(changed["id"], changed["stock"]):
+                        self._refresh_stock_table()
                 else:
                     if self.toast_cb:
                         self.toast_cb(f"Quantidade atualizada: {new_qty}")
             
             elif col == 2:  # Tamanho
-                new_size = item.text().strip()
-                
                 self.db.execute(
                     "UPDATE production_items SET size = ? WHERE id = ?",
-                    (new_size, item_id)
+                    (text, item_id)
                 )
                 
-                # Atualiza o display com formatação
-                item.setText(format_size(new_size) if new_size else "")
-                item.setData(Qt.ItemDataRole.UserRole, new_size)
-                
                 if self.toast_cb:
-                    self.toast_cb(f"Tamanho atualizado: {format_size(new_size) if new_size else 'N/A'}")
+                    self.toast_cb(f"Tamanho atualizado: {format_size(text) if text else 'N/A'}")
             
             elif col == 3:  # Observações
-                new_notes = item.text().strip()
-                
                 self.db.execute(
                     "UPDATE production_items SET notes = ? WHERE id = ?",
-                    (new_notes, item_id)
+                    (text, item_id)
                 )
                 
                 if self.toast_cb:
                     self.toast_cb("Observação atualizada")
+            
+            return True
         
         except ValueError as e:
             if self.toast_cb:
                 self.toast_cb(f"Erro: {str(e)}")
-            # Reverte para o valor anterior
-            self._refresh_production_table()
+            # Rejeitar mantém o valor anterior na célula
+            return False
         except Exception as e:
             if self.toast_cb:
                 self.toast_cb(f"Erro ao atualizar: {str(e)}")
-            self._refresh_production_table()
+            return False
     
     def _refresh_stock_table(self) -> None:
         """Atualiza a tabela de estoque (lado direito) com encomendas da data selecionada"""
@@ -4293,67 +4714,20 @@ class ProductionPage(BasePage):
         except Exception:
             term = ""
         
-        # Obtém a data selecionada no calendário de produção
-        selected_date = self.production_date.date().toString("yyyy-MM-dd")
+        # Obtém o dia selecionado no calendário de produção
+        day_range = self._selected_day_range()
         
         # Busca produtos com total de encomendas da data selecionada
         if term:
-            like = f"%{term}%"
-            rows = self.db.query(
-                """SELECT p.id, p.name, p.stock, 
-                          COALESCE(SUM(o.quantity), 0) as total_orders
-                   FROM products p
-                   LEFT JOIN orders o ON o.product_id = p.id 
-                                      AND o.status != 'Entregue'
-                                      AND DATE(o.delivery_date) = ?
-                   WHERE p.name LIKE ?
-                   GROUP BY p.id, p.name, p.stock
-                   ORDER BY 
-                     CASE WHEN p.stock <= 0 THEN 0 WHEN p.stock < 5 THEN 1 ELSE 2 END,
-                     p.name""", 
-                (selected_date, like)
-            )
+            rows = self.db.query(_SQL_STOCK_BY_DATE_SEARCH, (*day_range, f"%{term}%"))
         else:
-            rows = self.db.query(
-                """SELECT p.id, p.name, p.stock, 
-                          COALESCE(SUM(o.quantity), 0) as total_orders
-                   FROM products p
-                   LEFT JOIN orders o ON o.product_id = p.id 
-                                      AND o.status != 'Entregue'
-                                      AND DATE(o.delivery_date) = ?
-                   GROUP BY p.id, p.name, p.stock
-                   ORDER BY 
-                     CASE WHEN p.stock <= 0 THEN 0 WHEN p.stock < 5 THEN 1 ELSE 2 END,
-                     p.name""",
-                (selected_date,)
-            )
+            rows = self.db.query(_SQL_STOCK_BY_DATE, day_range)
         
-        self.stock_table.setRowCount(0)
-        for r in rows:
-            row = self.stock_table.rowCount()
-            self.stock_table.insertRow(row)
-            
-            # Nome do produto no header vertical
-            self.stock_table.setVerticalHeaderItem(row, QTableWidgetItem(str(r["name"])))
-            
-            # Qtd (estoque atual)
-            stock_item = QTableWidgetItem(str(r["stock"]))
-            stock_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            # Destaca em vermelho claro se estoque negativo ou zero
-            if r["stock"] <= 0:
-                stock_item.setBackground(QColor(255, 102, 102))  # Vermelho claro
-                stock_item.setForeground(QColor(255, 255, 255))  # Texto branco
-                stock_item.setFont(QFont("Arial", 10, QFont.Weight.Bold))
-            # Destaca em amarelo se estoque baixo (menos de 5)
-            elif r["stock"] < 5:
-                stock_item.setBackground(QColor(255, 193, 7))  # Amarelo
-                stock_item.setForeground(QColor(0, 0, 0))  # Texto preto
-            self.stock_table.setItem(row, 0, stock_item)
-            
-            # Encomendas (total de pedidos não entregues)
-            orders_item = QTableWidgetItem(str(int(r["total_orders"])))
-            orders_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.stock_table.setItem(row, 1, orders_item)
+        self.stock_table.setUpdatesEnabled(False)
+        try:
+            self.stock_model.set_rows(rows)
+        finally:
+            self.stock_table.setUpdatesEnabled(True)
     
     def _add_production_item(self) -> None:
         """Adiciona um item manualmente à lista de produção"""
@@ -4361,13 +4735,8 @@ class ProductionPage(BasePage):
         if dialog.exec() == QDialog.DialogCode.Accepted:
             product_id, product_name, quantity, sizes, notes = dialog.get_values()
             
-            # Salva no banco de dados
-            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            self.db.execute("""
-                INSERT INTO production_items (product_id, quantity, size, notes, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            """, (product_id, quantity, sizes, notes, now))
+            # Salva no banco de dados (created_at gerado pelo próprio SQLite)
+            self.db.execute(_SQL_INSERT_PRODUCTION_ITEM, (product_id, quantity, sizes, notes))
             
             # Atualiza a tabela
             self._refresh_production_table()
@@ -4380,27 +4749,6 @@ class ProductionPage(BasePage):
         # Usa a data selecionada no campo production_date
         selected_date = self.production_date.date().toString("yyyy-MM-dd")
         
-        # Debug: mostra quais pedidos existem na data
-        debug_rows = self.db.query(
-            """
-            SELECT o.id, p.name, o.quantity, o.delivery_date, o.status, o.notes
-            FROM orders o
-            LEFT JOIN products p ON p.id = o.product_id
-            WHERE DATE(o.delivery_date) = ?
-            ORDER BY p.name
-            """,
-            (selected_date,)
-        )
-        
-        if debug_rows:
-            print(f"\n📋 Pedidos encontrados para {selected_date}:")
-            for dr in debug_rows:
-                product_name = dr['name'] if dr['name'] else "Pedidos em lote"
-                notes_info = f" (LOTE)" if dr['notes'] and dr['notes'].startswith('LOTE:') else ""
-                print(f"  - ID:{dr['id']} | {product_name}{notes_info} | Qtd:{dr['quantity']} | Status:{dr['status']}")
-        else:
-            print(f"\n📋 Nenhum pedido encontrado para {selected_date}")
-        
         rows = self.db.query(
             """
             SELECT 
@@ -4427,26 +4775,29 @@ class ProductionPage(BasePage):
             (selected_date,)
         )
         
+        # Diagnóstico a partir do próprio resultado (sem consulta extra); só em nível DEBUG
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Pedidos importáveis para %s: %d", selected_date, len(rows))
+            for r in rows:
+                notes_info = " (LOTE)" if r["notes"] and r["notes"].startswith("LOTE:") else ""
+                logger.debug("  - ID:%s | %s%s | Qtd:%s", r["order_id"], r["produto"], notes_info, r["total"])
+        
         if not rows:
             if self.toast_cb:
                 self.toast_cb(f"Nenhum pedido encontrado para {selected_date}")
             return
         
-        # Limpa a lista atual (do banco também)
-        self.db.execute("DELETE FROM production_items")
-        
-        # Adiciona os itens ao banco
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        for r in rows:
+        params = [
             # Para pedidos em lote ou normais
-            customer_info = r["customer_name"] if r["customer_name"] else "Cliente desconhecido"
-            notes = f"{customer_info} - Importado de pedidos"
-            
-            self.db.execute("""
-                INSERT INTO production_items (product_id, quantity, size, notes, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            """, (r["product_id"], r["total"], r["size"], notes, now))
+            (r["product_id"], r["total"], r["size"],
+             f"{r['customer_name'] or 'Cliente desconhecido'} - Importado de pedidos")
+            for r in rows
+        ]
+        
+        # Limpa a lista atual e adiciona os itens numa única transação (um só commit)
+        with self.db.conn:
+            self.db.conn.execute("DELETE FROM production_items")
+            self.db.conn.executemany(_SQL_INSERT_PRODUCTION_ITEM, params)
         
         # Atualiza a tabela
         self._refresh_production_table()
@@ -4456,27 +4807,21 @@ class ProductionPage(BasePage):
     
     def _remove_selected_item(self) -> None:
         """Remove o item selecionado da lista de produção"""
-        selected = self.production_table.currentRow()
+        selected = self.production_table.currentIndex().row()
         if selected >= 0:
-            product_name = self.production_table.item(selected, 0).text() if self.production_table.item(selected, 0) else ""
+            product_name = self.production_model.item_name(selected)
             
             # Busca o ID do item no banco
-            item_id = self.production_table.item(selected, 0).data(Qt.ItemDataRole.UserRole)
+            item_id, _product_id = self.production_model.item_ids(selected)
             
-            if item_id:
-                # Remove do banco
-                self.db.execute("DELETE FROM production_items WHERE id = ?", (item_id,))
-                
-                # Atualiza a tabela
-                self._refresh_production_table()
-                
-                if self.toast_cb:
-                    self.toast_cb(f"Item removido: {product_name}")
-            else:
-                # Fallback: remove apenas da UI (não deveria acontecer)
-                self.production_table.removeRow(selected)
-                if self.toast_cb:
-                    self.toast_cb(f"Item removido (apenas da UI): {product_name}")
+            # Remove do banco
+            self.db.execute("DELETE FROM production_items WHERE id = ?", (item_id,))
+            
+            # Atualiza a tabela
+            self._refresh_production_table()
+            
+            if self.toast_cb:
+                self.toast_cb(f"Item removido: {product_name}")
         else:
             if self.toast_cb:
                 self.toast_cb("Selecione um item para remover")
@@ -4485,7 +4830,8 @@ class ProductionPage(BasePage):
         """Inicia o timer quando a página é exibida"""
         super().showEvent(event)
         if hasattr(self, 'refresh_timer'):
-            self.refresh_timer.start(2000)
+            self._watch_window()
+            self._update_refresh_timer()
             self.refresh()  # Refresh imediato ao mostrar
     
     def hideEvent(self, event) -> None:
@@ -4494,6 +4840,39 @@ class ProductionPage(BasePage):
         if hasattr(self, 'refresh_timer'):
             self.refresh_timer.stop()
     
+    def _watch_window(self) -> None:
+        """Instala o eventFilter na janela de topo da página.
+        
+        WindowStateChange (minimizar/restaurar) só é entregue à janela de
+        topo, nunca aos widgets filhos; por isso a página observa a janela.
+        """
+        win = self.window()
+        if win is self or win is self._watched_window:
+            return
+        if self._watched_window is not None:
+            self._watched_window.removeEventFilter(self)
+        win.installEventFilter(self)
+        self._watched_window = win
+    
+    def eventFilter(self, obj, event) -> bool:
+        """Ajusta o auto-refresh quando a janela é minimizada/restaurada ou perde/ganha foco"""
+        if obj is self._watched_window \
+                and event.type() in (QEvent.Type.WindowStateChange, QEvent.Type.ActivationChange):
+            was_fast = self.refresh_timer.isActive() and self.refresh_timer.interval() == 2000
+            self._update_refresh_timer()
+            if not was_fast and self.refresh_timer.interval() == 2000 and self.refresh_timer.isActive():
+                self._auto_refresh()  # Voltou ao foco: atualiza já, sem esperar o próximo tick
+        return super().eventFilter(obj, event)
+    
+    def _update_refresh_timer(self) -> None:
+        """2s com a janela ativa, 5s visível sem foco, parado se oculta/minimizada"""
+        if not self.isVisible() or self.window().isMinimized():
+            self.refresh_timer.stop()
+            return
+        interval = 2000 if self.isActiveWindow() else 5000
+        if not self.refresh_timer.isActive() or self.refresh_timer.interval() != interval:
+            self.refresh_timer.start(interval)
+    
     
     def _on_date_changed(self, date: QDate) -> None:
         """Callback quando a data é alterada"""
@@ -4517,39 +4896,39 @@ class ProductionPage(BasePage):
                 self.toast_cb("⚠️ Lista de produção vazia!")
             return
         
-        # Salva no arquivo JSON para o painel web
-        try:
-            import json
-            data = {
-                "date": selected_date,
-                "items": [
-                    {
-                        "produto": row["name"],
-                        "quantidade": row["quantity"],
-                        "tamanho": row["size"] or "N/A",
-                        "obs": row["notes"] or ""
-                    }
-                    for row in production_rows
-                ]
-            }
-            
-            # Salva no diretório web
-            web_dir = os.path.join(os.path.dirname(__file__), "web")
-            os.makedirs(web_dir, exist_ok=True)
-            
-            json_path = os.path.join(web_dir, "production_list.json")
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            
-            if self.toast_cb:
-                self.toast_cb(f"🔥 Lista disparada para cozinha! ({len(production_rows)} itens)")
+        # Monta os dados aqui (rápido); a escrita do JSON roda fora da thread da UI
+        data = {
+            "date": selected_date,
+            "items": [
+                {
+                    "produto": row["name"],
+                    "quantidade": row["quantity"],
+                    "tamanho": row["size"] or "N/A",
+                    "obs": row["notes"] or ""
+                }
+                for row in production_rows
+            ]
+        }
         
-        except Exception as e:
-            show_message(self, "Erro", f"Erro ao disparar lista: {e}", ("OK",))
+        # Salva no diretório web
+        json_path = os.path.join(os.path.dirname(__file__), "web", "production_list.json")
+        self.btn_dispatch.setEnabled(False)
+        self._kitchen_writer = ProductionListWriter(json_path, data)
+        self._kitchen_writer.written.connect(self._on_kitchen_list_written)
+        self._kitchen_writer.start()
+    
+    def _on_kitchen_list_written(self, ok: bool, message: str) -> None:
+        """Callback (thread da UI) ao terminar a escrita da lista da cozinha"""
+        self.btn_dispatch.setEnabled(True)
+        if not ok:
+            show_message(self, "Erro", f"Erro ao disparar lista: {message}", ("OK",))
+            return
+        if self.toast_cb:
+            self.toast_cb(f"🔥 Lista disparada para cozinha! ({message} itens)")
     
     def _clear_list(self) -> None:
         """Limpa toda a lista de produção"""
-        if self.production_table.rowCount() == 0:
+        if self.production_model.rowCount() == 0:
             if self.toast_cb:
                 self.toast_cb("Lista já está vazia")
             return
@@ -4557,7 +4936,7 @@ class ProductionPage(BasePage):
         reply = show_message(
             self,
             "Limpar Lista",
-            f"Tem certeza que deseja limpar todos os {self.production_table.rowCount()} item(ns) da lista de produção?",
+            f"Tem certeza que deseja limpar todos os {self.production_model.rowCount()} item(ns) da lista de produção?",
             ("Cancelar", "Limpar"),
             default=0
         )
@@ -4720,32 +5099,30 @@ class ProductionItemDialog(QDialog):
         layout.addLayout(btns_layout)
     
     def _load_products(self) -> None:
-        """Carrega lista de produtos no combobox"""
+        """Carrega lista de produtos no combobox (e os tamanhos de cada um, já formatados)"""
         self.product.clear()
-        rows = self.db.query("SELECT id, name FROM products ORDER BY name")
+        rows = self.db.query("SELECT id, name, size FROM products ORDER BY name")
+        # product_id -> [(tamanho formatado, tamanho original), ...]
+        self._sizes_by_pid: dict[int, list[tuple[str, str]]] = {}
         for r in rows:
             self.product.addItem(r["name"], r["id"])
+            sizes = [s.strip() for s in (r["size"] or "").split(",") if s.strip()]
+            self._sizes_by_pid[r["id"]] = [(format_size(size), size) for size in sizes]
     
     def _on_product_changed(self) -> None:
-        """Atualiza lista de tamanhos quando produto muda"""
+        """Atualiza lista de tamanhos quando produto muda (sem consultar o banco)"""
         self.size_combo.clear()
         
         prod_id = self.product.currentData()
         if not prod_id:
             return
         
-        # Busca os tamanhos do produto
-        rows = self.db.query("SELECT size FROM products WHERE id=?", (prod_id,))
-        if not rows or not rows[0]["size"]:
+        sizes = self._sizes_by_pid.get(prod_id)
+        if not sizes:
             self.size_combo.addItem("Tamanho único")
             return
         
-        # Separa tamanhos por vírgula e adiciona ao combo
-        size_str = rows[0]["size"]
-        sizes = [s.strip() for s in size_str.split(",") if s.strip()]
-        
-        for size in sizes:
-            formatted_size = format_size(size)
+        for formatted_size, size in sizes:
             self.size_combo.addItem(formatted_size, size)  # Exibe formatado, guarda original
         
         # Seleciona o primeiro por padrão
@@ -4754,14 +5131,10 @@ class ProductionItemDialog(QDialog):
     
     def get_values(self) -> tuple[int, str, int, str, str]:
         """Retorna (product_id, nome_produto, quantidade, tamanho_selecionado, observações)"""
+        # O ID já está no userData do combo (evita nova consulta e ambiguidade com nomes repetidos)
+        product_id = int(self.product.currentData() or 0)
         product_name = self.product.currentText()
         
-        # Busca o ID do produto selecionado
-        product_id = 0
-        rows = self.db.query("SELECT id FROM products WHERE name = ?", (product_name,))
-        if rows:
-            product_id = rows[0]["id"]
-        
         qty = self.quantity.value()
         
         # Pega o tamanho selecionado ou digitado
@@ -4779,60 +5152,826 @@ class ProductionItemDialog(QDialog):
 # ========================================
 # Database Dialog - Modal para gerenciamento completo do banco
 # ========================================
-class DatabaseDialog(QDialog):
-    """Diálogo modal para gerenciamento completo do banco de dados"""
-    
-    def __init__(self, parent: Optional[QWidget] = None, toast_cb: Optional[Callable[[str], None]] = None, backup_cb: Optional[Callable[[], None]] = None) -> None:
-        super().__init__(parent)
-        self.toast_cb = toast_cb
-        self.backup_cb = backup_cb
-        self.setWindowTitle("Gerenciamento de Banco de Dados")
-        self.setMinimumSize(700, 600)
-        self.setModal(True)
-        
-        # Detecta o tema atual
-        try:
-            from core.config import load_config
-            theme = load_config().get("theme", "light")
-            is_dark = (theme == "dark")
+
+# Ícones de emoji renderizados uma única vez (evita reshaping da fonte colorida a cada paint)
+_EMOJI_ICONS: dict[str, QIcon] = {}
+
+
+def _emoji_icon(emoji: str, size: int = 20) -> QIcon:
+    """Retorna um QIcon com o emoji desenhado num QPixmap (cacheado por emoji)."""
+    icon = _EMOJI_ICONS.get(emoji)
+    if icon is None:
+        pix = QPixmap(size * 2, size * 2)
+        pix.setDevicePixelRatio(2.0)
+        pix.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pix)
+        font = painter.font()
+        font.setPixelSize(size - 4)
+        painter.setFont(font)
+        painter.drawText(0, 0, size, size, Qt.AlignmentFlag.AlignCenter, emoji)
+        painter.end()
+        icon = QIcon(pix)
+        _EMOJI_ICONS[emoji] = icon
+    return icon
+
+
+# Cores do diálogo por tema
+@dataclass(frozen=True, slots=True)
+class _DbDialogPalette:
+    bg_main: str
+    bg_group: str
+    text_main: str
+    text_secondary: str
+    btn_text: str
+    btn_bg: str
+    btn_hover: str
+    btn_pressed: str
+    btn_primary: str
+    btn_primary_hover: str
+    status_bg: str
+    warning_bg: str
+    warning_text: str
+    config_bg: str
+    config_hover: str
+    cloud_bg: str
+    cloud_hover: str
+    restore_bg: str
+    restore_hover: str
+    close_bg: str
+    close_hover: str
+
+
+_DB_DIALOG_PALETTES: dict[str, _DbDialogPalette] = {
+    "dark": _DbDialogPalette(
+        bg_main="#1e1e1e",
+        bg_group="rgba(60, 60, 60, 0.3)",
+        text_main="#f3f4f6",
+        text_secondary="#9ca3af",
+        btn_text="white",
+        btn_bg="#4b5563",
+        btn_hover="#6b7280",
+        btn_pressed="#374151",
+        btn_primary="#3b82f6",
+        btn_primary_hover="#2563eb",
+        status_bg="rgba(255,255,255,0.05)",
+        warning_bg="rgba(245, 158, 11, 0.15)",
+        warning_text="#fbbf24",
+        config_bg="#7c3aed",
+        config_hover="#6d28d9",
+        cloud_bg="#059669",
+        cloud_hover="#047857",
+        restore_bg="#d97706",
+        restore_hover="#b45309",
+        close_bg="#6b7280",
+        close_hover="#4b5563",
+    ),
+    "light": _DbDialogPalette(
+        bg_main="#ffffff",
+        bg_group="rgba(100, 100, 100, 0.08)",
+        text_main="#1f2937",
+        text_secondary="#6b7280",
+        btn_text="#1f2937",
+        btn_bg="#e5e7eb",
+        btn_hover="#d1d5db",
+        btn_pressed="#c7d2fe",
+        btn_primary="#3b82f6",
+        btn_primary_hover="#2563eb",
+        status_bg="rgba(0,0,0,0.1)",
+        warning_bg="rgba(245, 158, 11, 0.1)",
+        warning_text="#d97706",
+        config_bg="#8b5cf6",
+        config_hover="#7c3aed",
+        cloud_bg="#10b981",
+        cloud_hover="#059669",
+        restore_bg="#f59e0b",
+        restore_hover="#d97706",
+        close_bg="#9ca3af",
+        close_hover="#6b7280",
+    ),
+}
+
+
+def _render_db_dialog_qss(c: _DbDialogPalette) -> str:
+    """Monta o QSS do DatabaseDialog com seletores por objectName."""
+    return f"""
+        QDialog#DatabaseDialog {{
+            background: {c.bg_main};
+        }}
+        #DatabaseDialog QLabel {{
+            color: {c.text_main};
+        }}
+        QLabel#DbDialogTitle {{
+            font-size: 20px; font-weight: bold; margin-bottom: 8px; color: {c.text_main};
+        }}
+        QFrame#SettingsGroup {{
+            background: {c.bg_group};
+            border-radius: 8px;
+            padding: 12px;
+        }}
+        QLabel#DbGroupTitle {{
+            font-size: 14px; margin-bottom: 8px; color: {c.text_main};
+        }}
+        QLabel#DbPathLabel {{
+            color: {c.text_secondary}; padding: 8px; font-family: monospace; font-size: 12px;
+        }}
+        QLabel#DbStatusLabel {{
+            color: {c.text_secondary}; padding: 8px; background: {c.status_bg}; border-radius: 4px; font-size: 12px;
+        }}
+        QLabel#DbWarning {{
+            color: {c.warning_text}; padding: 12px; font-size: 13px; background: {c.warning_bg}; border-radius: 6px;
+        }}
+        QPushButton#DbActionButton, QPushButton#DbStatusButton {{
+            background: {c.btn_bg};
+            color: {c.btn_text};
+            border: none;
+            border-radius: 8px;
+            padding: 10px 16px;
+            font-size: 14px;
+            font-weight: 500;
+            text-align: left;
+        }}
+        QPushButton#DbStatusButton {{
+            padding: 8px 14px;
+            font-size: 13px;
+            font-weight: normal;
+            text-align: center;
+        }}
+        QPushButton#DbActionButton:hover, QPushButton#DbStatusButton:hover {{
+            background: {c.btn_hover};
+        }}
+        QPushButton#DbActionButton:pressed, QPushButton#DbStatusButton:pressed {{
+            background: {c.btn_pressed};
+        }}
+        QPushButton#btnConfigAutoBackup, QPushButton#btnDoBackup,
+        QPushButton#btnCloudBackup, QPushButton#btnRestoreBackup {{
+            color: white;
+            border: none;
+            border-radius: 8px;
+            padding: 10px 18px;
+            font-size: 14px;
+            font-weight: 500;
+        }}
+        QPushButton#btnConfigAutoBackup {{ background: {c.config_bg}; }}
+        QPushButton#btnConfigAutoBackup:hover {{ background: {c.config_hover}; }}
+        QPushButton#btnConfigAutoBackup:pressed {{ background: #6d28d9; }}
+        QPushButton#btnDoBackup {{ background: {c.btn_primary}; }}
+        QPushButton#btnDoBackup:hover {{ background: {c.btn_primary_hover}; }}
+        QPushButton#btnDoBackup:pressed {{ background: #1d4ed8; }}
+        QPushButton#btnCloudBackup {{ background: {c.cloud_bg}; }}
+        QPushButton#btnCloudBackup:hover {{ background: {c.cloud_hover}; }}
+        QPushButton#btnCloudBackup:pressed {{ background: #047857; }}
+        QPushButton#btnRestoreBackup {{ background: {c.restore_bg}; }}
+        QPushButton#btnRestoreBackup:hover {{ background: {c.restore_hover}; }}
+        QPushButton#btnRestoreBackup:pressed {{ background: #b45309; }}
+        QPushButton#btnClose {{
+            background: {c.close_bg};
+            color: white;
+            border: none;
+            border-radius: 8px;
+            padding: 8px 24px;
+            font-size: 14px;
+        }}
+        QPushButton#btnClose:hover {{
+            background: {c.close_hover};
+        }}
+    """
+
+
+# Folhas de estilo finais, renderizadas uma única vez na importação
+_DB_DIALOG_QSS: dict[str, str] = {
+    theme: _render_db_dialog_qss(palette) for theme, palette in _DB_DIALOG_PALETTES.items()
+}
+
+
+# Diálogo de seleção de backup da nuvem (DatabaseDialog._select_cloud_backup):
+# uma folha por tema, montada uma vez em vez de a cada abertura
+_CLOUD_BACKUP_LIST_QSS = """
+    QListWidget#CloudBackupList {{
+        font-family: 'Consolas', 'Courier New', monospace;
+        font-size: 11px;
+        background-color: {list_bg};
+        color: {text};
+        border: 1px solid {border};
+    }}
+    QListWidget#CloudBackupList::item {{
+        padding: 8px;
+        border-bottom: 1px solid {border};
+    }}
+    QListWidget#CloudBackupList::item:hover {{
+        background-color: {hover};
+    }}
+    QListWidget#CloudBackupList::item:selected {{
+        background-color: #0078d4;
+        color: white;
+    }}
+    QLabel#CloudBackupTitle {{
+        font-weight: bold;
+        font-size: 12px;
+        margin-bottom: 10px;
+    }}
+    QLabel#CloudBackupInfo {{
+        color: {info};
+        font-size: 10px;
+        margin-top: 5px;
+    }}
+"""
+
+_DARK_QSS = """
+    QDialog { 
+        background-color: #2b2b2b; 
+        color: #ffffff; 
+    }
+    QLabel {
+        color: #ffffff;
+    }
+""" + _CLOUD_BACKUP_LIST_QSS.format(list_bg="#1e1e1e", text="#ffffff", border="#3f3f3f", hover="#2d2d2d", info="#999")
+
+_LIGHT_QSS = """
+    QDialog { 
+        background-color: #ffffff; 
+        color: #000000; 
+    }
+""" + _CLOUD_BACKUP_LIST_QSS.format(list_bg="#ffffff", text="#000000", border="#e0e0e0", hover="#f0f0f0", info="#666")
+
+_CLOUD_BACKUP_QSS: dict[str, str] = {"dark": _DARK_QSS, "light": _LIGHT_QSS}
+
+# Diálogo de automação de backup (DatabaseDialog.configure_auto_backup):
+# folhas por tema e texto informativo montados uma vez, não a cada abertura
+_AUTO_BACKUP_WIDGETS_QSS = """
+    QLabel#AutoBackupTitle {{ font-size: 16px; margin-bottom: 10px; }}
+    QCheckBox#AutoBackupEnable {{ font-size: 13px; margin-bottom: 10px; }}
+    QLabel#AutoBackupIntervalLabel {{ font-size: 13px; margin-top: 10px; }}
+    QSpinBox#AutoBackupInterval {{ font-size: 13px; padding: 5px; }}
+    QLabel#AutoBackupTypeLabel {{ font-size: 13px; margin-top: 15px; }}
+    QCheckBox#AutoBackupOption {{ font-size: 13px; margin-left: 10px; }}
+    QCheckBox#AutoBackupOptionBoth {{ font-size: 13px; margin-left: 10px; font-weight: bold; }}
+    QLabel#AutoBackupInfo {{
+        padding: 15px;
+        background: {info_bg};
+        border-radius: 8px;
+        font-size: 12px;
+        margin-top: 15px;
+    }}
+"""
+
+_AUTO_BACKUP_QSS: dict[str, str] = {
+    "dark": """
+    QDialog { 
+        background-color: #2b2b2b; 
+        color: #ffffff; 
+    }
+    QLabel { 
+        color: #ffffff; 
+    }
+    QCheckBox { 
+        color: #ffffff;
+    }
+    QRadioButton { 
+        color: #ffffff;
+        spacing: 5px;
+    }
+    QRadioButton::indicator {
+        width: 16px;
+        height: 16px;
+    }
+""" + _AUTO_BACKUP_WIDGETS_QSS.format(info_bg="rgba(100, 100, 255, 0.15)"),
+    "light": """
+    QDialog { 
+        background-color: #ffffff; 
+        color: #000000; 
+    }
+    QLabel { 
+        color: #000000; 
+    }
+    QCheckBox { 
+        color: #000000;
+    }
+    QRadioButton { 
+        color: #000000;
+        spacing: 5px;
+    }
+    QRadioButton::indicator {
+        width: 16px;
+        height: 16px;
+        border: 2px solid #999999;
+        border-radius: 8px;
+        background-color: #ffffff;
+    }
+    QRadioButton::indicator:checked {
+        background-color: #0078d4;
+        border: 2px solid #0078d4;
+    }
+    QRadioButton::indicator:hover {
+        border: 2px solid #0078d4;
+    }
+""" + _AUTO_BACKUP_WIDGETS_QSS.format(info_bg="rgba(100, 100, 255, 0.1)"),
+}
+
+_AUTO_BACKUP_INFO_HTML = (
+    "ℹ️ <b>Informações:</b><br>"
+    "• O backup será executado automaticamente a cada intervalo<br>"
+    "• <b>Local:</b> Salvo na pasta 'backups' (rápido, sem internet)<br>"
+    "• <b>Nuvem:</b> Enviado para GitHub (seguro, requer conexão)<br>"
+    "• <b>Ambos:</b> Salva localmente E envia para nuvem (recomendado) 🔒<br>"
+    "• Você receberá notificações quando o backup for feito<br>"
+    "• O backup automático começa ao iniciar o sistema"
+)
+
+# ZIPs de backup no repositório da nuvem ("backup" em qualquer caixa, antes do .zip)
+_BACKUP_RE = re.compile(r'(?i)backup.*\.zip$')
+
+# Trechos da saída do git que indicam falha de autenticação SSH (qualquer caixa)
+_SSH_ERR_RE = re.compile(
+    r"host key verification failed|could not read from remote repository|permission denied|publickey",
+    re.IGNORECASE,
+)
+
+# Linhas de progresso do git ("Receiving objects:  42% (21/50)")
+_GIT_PROGRESS_RE = re.compile(r'^(?:remote:\s*)?([A-Za-z ]+):\s+(\d+)%')
+# Faixa da barra (0-100) ocupada por cada fase do git
+_GIT_PROGRESS_PHASES = {
+    "Counting objects": (5, 10),
+    "Compressing objects": (10, 20),
+    "Receiving objects": (20, 85),
+    "Resolving deltas": (85, 95),
+    "Updating files": (95, 99),
+}
+
+
+def _git_progress_value(phase: str, percent: int) -> int:
+    """Converte (fase, % da fase) do git num valor único para a barra de progresso"""
+    start, end = _GIT_PROGRESS_PHASES.get(phase, (5, 10))
+    return start + (end - start) * percent // 100
+
+
+def _sqlite_snapshot(src_path: str, dest_path: str) -> None:
+    """Copia consistente de um banco SQLite em uso (API de backup online).
+    
+    Ao contrário de copiar o .db, inclui as páginas ainda no WAL e não
+    bloqueia quem está escrevendo; o destino sai sem -wal/-shm.
+    """
+    src = sqlite3.connect(src_path, timeout=10)
+    try:
+        dst = sqlite3.connect(dest_path)
+        try:
+            with dst:
+                src.backup(dst, pages=1000, sleep=0.005)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
+
+def _fast_copy(src: str, dst: str) -> None:
+    """Copia o conteúdo de src para dst pelo caminho mais rápido do sistema.
+    
+    No Windows usa CopyFile2 (cópia feita pelo kernel, sem passar pelos
+    buffers do Python); nos demais, shutil.copyfile, que já usa sendfile
+    (Linux) / fcopyfile (macOS). Não copia metadados como o copy2.
+    """
+    if sys.platform == 'win32':
+        try:
+            if ctypes.windll.kernel32.CopyFile2(src, dst, None) == 0:  # S_OK
+                return
         except Exception:
-            is_dark = False
-        
-        # Define cores baseadas no tema
-        if is_dark:
-            bg_main = "#1e1e1e"
-            bg_group = "rgba(60, 60, 60, 0.3)"
-            text_main = "#f3f4f6"
-            text_secondary = "#9ca3af"
-            btn_bg = "#4b5563"
-            btn_hover = "#6b7280"
-            btn_pressed = "#374151"
-            btn_primary = "#3b82f6"
-            btn_primary_hover = "#2563eb"
-            warning_bg = "rgba(245, 158, 11, 0.15)"
-            warning_text = "#fbbf24"
+            pass
+    shutil.copyfile(src, dst)
+
+
+def _remove_db_files(db_path: str, suffixes: Sequence[str] = ("", "-wal", "-shm")) -> None:
+    """Remove db_path + cada sufixo numa única varredura do diretório.
+    
+    Um scandir e só os unlinks dos arquivos que existem, em vez de um
+    stat/tentativa por arquivo. Falhas de remoção são propagadas.
+    """
+    base = os.path.basename(db_path)
+    targets = {os.path.normcase(base + suffix) for suffix in suffixes}
+    with os.scandir(os.path.dirname(db_path) or ".") as it:
+        hits = [entry.path for entry in it if os.path.normcase(entry.name) in targets]
+    for path in hits:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def _swap_restored_db(restored_path: str, current_path: str) -> bool:
+    """Coloca o banco restaurado (e o -wal dele, se houver) no lugar do atual.
+    
+    Com o arquivo livre, os -wal/-shm antigos vão para o lado (voltam se a
+    troca falhar) e o .db entra por os.replace. Se o banco estiver aberto
+    pelo app (no Windows o SQLite abre sem FILE_SHARE_DELETE e a renomeação
+    dá PermissionError), o conteúdo é gravado dentro do banco vivo pela API
+    de backup online, que respeita o WAL e os locks das outras conexões.
+    Retorna True se os arquivos foram trocados, False se gravou no lugar.
+    """
+    aside: list[tuple[str, str]] = []
+    try:
+        for suffix in ("-wal", "-shm"):
+            old = current_path + suffix
+            if os.path.isfile(old):
+                os.replace(old, old + ".pre-restore")
+                aside.append((old + ".pre-restore", old))
+        os.replace(restored_path, current_path)
+    except Exception as e:
+        # Nada foi trocado: devolve o WAL/SHM do banco atual
+        for moved, original in reversed(aside):
+            os.replace(moved, original)
+        if not isinstance(e, PermissionError):
+            raise
+        _sqlite_snapshot(restored_path, current_path)
+        return False
+    
+    if os.path.isfile(restored_path + "-wal"):
+        os.replace(restored_path + "-wal", current_path + "-wal")
+    for moved, _original in aside:
+        try:
+            os.remove(moved)
+        except OSError as e:
+            print(f"[Restore] ⚠️ Não foi possível remover {moved}: {e}")
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def _has_cmd(cmd: str) -> bool:
+    """True se `cmd --version` roda com sucesso; sondado uma vez por processo.
+    
+    Criar um processo no Windows custa dezenas de ms; git/winget não somem
+    durante a execução. Após instalar algo, chame _has_cmd.cache_clear().
+    """
+    try:
+        result = subprocess.run(
+            [cmd, "--version"],
+            capture_output=True,
+            timeout=5,
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        )
+        return result.returncode == 0
+    except Exception:
+        return False
+
+
+def _popen_group(args: list[str], **kwargs: Any) -> subprocess.Popen:
+    """Popen do git preparado para _stop_process_group encerrar a árvore inteira.
+    
+    No POSIX o git ganha uma sessão (grupo de processos) própria, junto com
+    os filhos ssh/askpass; no Windows roda sem console.
+    """
+    if sys.platform == "win32":
+        kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+    else:
+        kwargs["start_new_session"] = True
+    return subprocess.Popen(args, **kwargs)
+
+
+def _kill_process_tree(proc: subprocess.Popen, grace: float) -> None:
+    if proc.poll() is not None:
+        return
+    if sys.platform == "win32":
+        # Sem console, CTRL_BREAK não chega ao git; taskkill /T derruba
+        # também os filhos (ssh.exe, git-remote-*), que o kill() deixaria vivos
+        try:
+            subprocess.run(
+                ["taskkill", "/T", "/F", "/PID", str(proc.pid)],
+                capture_output=True,
+                timeout=10,
+                creationflags=subprocess.CREATE_NO_WINDOW
+            )
+        except Exception:
+            pass
+        if proc.poll() is None:
+            try:
+                proc.kill()
+            except OSError:
+                pass
+        return
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except OSError:
+        return
+    try:
+        proc.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def _stop_process_group(proc: subprocess.Popen, grace: float = 0.5) -> threading.Thread:
+    """Encerra um processo criado por _popen_group e seus filhos, sem bloquear.
+    
+    taskkill /T (Windows) / SIGTERM no grupo e, após `grace` segundos,
+    SIGKILL (POSIX), numa thread daemon: a espera não trava a GUI.
+    Retorna a thread para quem precisar aguardar o fim.
+    """
+    stopper = threading.Thread(target=_kill_process_tree, args=(proc, grace), daemon=True)
+    stopper.start()
+    return stopper
+
+
+def _rmtree_force(path: str) -> None:
+    """shutil.rmtree que também remove arquivos somente leitura.
+    
+    No Windows o git grava .git/objects/pack/*.idx/*.pack como somente
+    leitura e o rmtree comum falha neles; aqui o bit é limpo e a remoção
+    repetida uma vez, na mesma passada.
+    """
+    def clear_readonly(func: Callable[..., Any], p: str, _exc: Any) -> None:
+        os.chmod(p, stat.S_IWRITE)
+        func(p)
+    
+    if sys.version_info >= (3, 12):
+        shutil.rmtree(path, onexc=clear_readonly)
+    else:
+        shutil.rmtree(path, onerror=clear_readonly)
+
+
+def _git_shallow_sync(repo_dir: str, timeout: float = 30) -> tuple[bool, str]:
+    """Deixa o clone raso do repositório de backups igual à main remota.
+    
+    fetch --depth=1 + reset --hard FETCH_HEAD: um `pull` num clone raso
+    tenta mesclar históricos sem ancestral comum. Commits locais que não
+    chegaram a ser enviados saem do repositório (os ZIPs seguem em BACKUP_DIR).
+    Retorna (sucesso, stderr do passo que falhou).
+    """
+    flags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+    fetch = subprocess.run(
+        ["git", "-C", repo_dir, "fetch", "--depth=1", "--filter=blob:none", "--no-tags", "origin", "main"],
+        capture_output=True, text=True, timeout=timeout, creationflags=flags
+    )
+    if fetch.returncode != 0:
+        return False, fetch.stderr
+    reset = subprocess.run(
+        ["git", "-C", repo_dir, "reset", "--hard", "FETCH_HEAD"],
+        capture_output=True, text=True, timeout=timeout, creationflags=flags
+    )
+    return reset.returncode == 0, reset.stderr
+
+
+def _stat_db_dir(db_dir: str) -> dict[str, os.DirEntry]:
+    """Lista o diretório do banco uma única vez: {nome normalizado: DirEntry} dos arquivos.
+    
+    Em compartilhamentos SMB cada isfile/getsize é uma ida e volta pela rede;
+    a listagem traz todos os nomes (e, no Windows, os stats) de uma vez.
+    Consulte com os.path.normcase(nome).
+    """
+    files: dict[str, os.DirEntry] = {}
+    try:
+        with os.scandir(db_dir or ".") as it:
+            for entry in it:
+                try:
+                    if entry.is_file():
+                        files[os.path.normcase(entry.name)] = entry
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return files
+
+
+_DB_STATUS_TEMPLATE = (
+    "📊 Tamanho: {size_mb:.2f} MB ({size_bytes:,} bytes)\n"
+    "{journal}"
+    "{counts}"
+    "{location}\n"
+    "{perms}\n"
+    "🕐 Modificado: {time_str}"
+)
+
+
+class GitFetchWorker(QThread):
+    """Atualiza o clone raso do repositório de backups fora do thread da GUI.
+    
+    git fetch --depth=1 da main + reset --hard FETCH_HEAD, com o progresso
+    real lido do stderr do git.
+    """
+    progress = pyqtSignal(int, str)  # (valor 0-100 da barra, fase/percentual)
+    result = pyqtSignal(bool, str)  # (sucesso, mensagem de erro)
+    
+    def __init__(self, repo_dir: str, timeout: float = 30) -> None:
+        super().__init__()
+        self.repo_dir = repo_dir
+        self.timeout = timeout
+        self._proc: Optional[subprocess.Popen] = None
+        self._cancelled = False
+        self._timed_out = False
+    
+    def cancel(self) -> None:
+        """Encerra o git (e filhos) em andamento; seguro a partir de outra thread."""
+        self._cancelled = True
+        if self._proc is not None:
+            _stop_process_group(self._proc)
+    
+    def run(self) -> None:
+        try:
+            ok, message = self._fetch()
+        except Exception as e:
+            ok, message = False, f"Erro inesperado: {e}"
+        self.result.emit(ok, message)
+    
+    def _stop_on_timeout(self) -> None:
+        self._timed_out = True
+        if self._proc is not None:
+            _stop_process_group(self._proc)
+    
+    def _fetch(self) -> tuple[bool, str]:
+        # Busca só o último commit da main (raso, blobs sob demanda);
+        # um pull em clone raso tentaria mesclar históricos sem ancestral comum
+        proc = _popen_group(
+            ["git", "-C", self.repo_dir, "fetch", "--progress", "--depth=1",
+             "--filter=blob:none", "--no-tags", "origin", "main"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+        self._proc = proc
+        if self._cancelled:
+            _stop_process_group(proc)
+        
+        # Timeout total: encerra o git, o que fecha o stderr abaixo
+        watchdog = threading.Timer(self.timeout, self._stop_on_timeout)
+        watchdog.daemon = True
+        watchdog.start()
+        
+        # Lê o progresso real do stderr até o git terminar (ou ser encerrado
+        # pelo cancelamento/timeout); ler também evita encher o pipe
+        stderr_tail: list[str] = []
+        last_value = -1
+        try:
+            for line in cast(Any, proc.stderr):
+                line = line.strip()
+                if not line:
+                    continue
+                stderr_tail = (stderr_tail + [line])[-20:]
+                match = _GIT_PROGRESS_RE.search(line)
+                if match:
+                    phase, percent = match.group(1), int(match.group(2))
+                    value = _git_progress_value(phase, percent)
+                    if value != last_value:
+                        last_value = value
+                        self.progress.emit(value, f"{phase}: {percent}%")
+            proc.wait()
+        finally:
+            watchdog.cancel()
+        
+        if self._cancelled:
+            return False, ""
+        if self._timed_out:
+            return False, f"Timeout: Atualização demorou muito (>{self.timeout:.0f}s)"
+        if proc.returncode != 0:
+            return False, "Erro ao atualizar:\n" + "\n".join(stderr_tail)
+        
+        # A árvore passa a ser exatamente a da nuvem (os ZIPs locais
+        # continuam em BACKUP_DIR)
+        reset = subprocess.run(
+            ["git", "-C", self.repo_dir, "reset", "--hard", "FETCH_HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=60,
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        )
+        if reset.returncode != 0:
+            return False, f"Erro ao atualizar:\n{reset.stderr}"
+        return True, ""
+
+
+class DbStatusProbe(QThread):
+    """Coleta o status do banco fora do thread da GUI.
+    
+    Em caminhos UNC cada stat/consulta custa uma ida e volta pela rede;
+    aqui elas não travam a interface.
+    """
+    result = pyqtSignal(str, str)  # (texto, "missing" | "local" | "network" | "error")
+    
+    def __init__(self, db_path: str, conn_factory: Callable[[], sqlite3.Connection],
+                 is_network_drive: Callable[[str], bool], use_counts_table: bool = True) -> None:
+        super().__init__()
+        self.db_path = db_path
+        self._conn_factory = conn_factory
+        self._is_network_drive = is_network_drive
+        self._use_counts_table = use_counts_table
+    
+    def run(self) -> None:
+        try:
+            self.result.emit(*self._probe())
+        except Exception as e:
+            self.result.emit(f"❌ Erro ao verificar status:\n{str(e)}", "error")
+    
+    def _probe(self) -> tuple[str, str]:
+        db_path = self.db_path
+        # Um único stat: existência, tamanho e data de modificação
+        try:
+            st = os.stat(db_path) if db_path else None
+        except OSError:
+            st = None
+        if st is None:
+            return "❌ Banco de dados não encontrado", "missing"
+        
+        # Localização primeiro: o modo de journal esperado depende dela
+        if db_path.startswith((_UNC_PREFIX, '//')):
+            location, is_network = "🌐 Localização: Rede (UNC)", True
+        elif len(db_path) > 1 and db_path[1] == ':' and self._is_network_drive(db_path[0]):
+            location, is_network = "🌐 Localização: Unidade de Rede Mapeada", True
         else:
-            bg_main = "#ffffff"
-            bg_group = "rgba(100, 100, 100, 0.08)"
-            text_main = "#1f2937"
-            text_secondary = "#6b7280"
-            btn_bg = "#e5e7eb"
-            btn_hover = "#d1d5db"
-            btn_pressed = "#c7d2fe"
-            btn_primary = "#3b82f6"
-            btn_primary_hover = "#2563eb"
-            warning_bg = "rgba(245, 158, 11, 0.1)"
-            warning_text = "#d97706"
-        
-        # Aplica estilo ao diálogo
-        self.setStyleSheet(f"""
-            QDialog {{
-                background: {bg_main};
-            }}
-            QLabel {{
-                color: {text_main};
-            }}
-        """)
+            location, is_network = "💻 Localização: Disco Local", False
+        
+        # Modo de journaling + totais numa única ida ao banco (importante em UNC).
+        # _counts é mantida por triggers; sem ela, cai para COUNT(*).
+        journal = counts = ""
+        try:
+            cursor = self._conn_factory().cursor()
+            row = None
+            queries = (_SQL_DB_STATUS_COUNTED, _SQL_DB_STATUS_SCAN) if self._use_counts_table else (_SQL_DB_STATUS_SCAN,)
+            for sql in queries:
+                try:
+                    row = cursor.execute(sql).fetchone()
+                    break
+                except sqlite3.OperationalError:
+                    continue
+            mode = row[0] if row else cursor.execute("PRAGMA journal_mode").fetchone()[0]
+            # Local: WAL (leitores não bloqueiam escritor).
+            # Rede: WAL não funciona/é lento; TRUNCATE ou DELETE são o esperado.
+            is_wal = mode.upper() == "WAL"
+            journal = f"{'✅' if is_wal != is_network else '⚠️'} Modo Journal: {mode}\n"
+            if is_wal and is_network:
+                journal += "⚠️ WAL em caminho de rede não é suportado pelo SQLite\n"
+            if row:
+                counts = "👥 Clientes: {}\n🍰 Produtos: {}\n📦 Pedidos: {}\n".format(*row[1:])
+            cursor.close()
+        except Exception as e:
+            journal = f"📝 Modo: Erro ao conectar ({str(e)[:30]}...)\n"
+        
+        # Permissões de acesso
+        can_read = os.access(db_path, os.R_OK)
+        can_write = os.access(db_path, os.W_OK)
+        if can_read and can_write:
+            perms = "🔓 Permissões: Leitura e Escrita ✅"
+        elif can_read:
+            perms = "⚠️ Permissões: Apenas Leitura"
+        else:
+            perms = "❌ Permissões: Sem Acesso"
+        
+        # Data de modificação
+        seconds = (datetime.now() - datetime.fromtimestamp(st.st_mtime)).total_seconds()
+        if seconds < 60:
+            time_str = "agora há pouco"
+        elif seconds < 3600:
+            mins = int(seconds / 60)
+            time_str = f"há {mins} minuto{'s' if mins > 1 else ''}"
+        elif seconds < 86400:
+            hours = int(seconds / 3600)
+            time_str = f"há {hours} hora{'s' if hours > 1 else ''}"
+        else:
+            days = int(seconds // 86400)
+            time_str = f"há {days} dia{'s' if days > 1 else ''}"
+        
+        text = _DB_STATUS_TEMPLATE.format(
+            size_mb=st.st_size / (1024 * 1024),
+            size_bytes=st.st_size,
+            journal=journal,
+            counts=counts,
+            location=location,
+            perms=perms,
+            time_str=time_str,
+        )
+        return text, ("network" if is_network else "local")
+
+
+class DatabaseDialog(QDialog):
+    """Diálogo modal para gerenciamento completo do banco de dados"""
+    
+    # Lê os totais de _counts (triggers) em vez de COUNT(*) no status do banco
+    use_counts_table = True
+    # Restauração: PRAGMA integrity_check completo em vez do quick_check
+    full_integrity_check = False
+    # Backup na nuvem: quantos ZIPs deste computador/banco ficam na árvore do repositório
+    cloud_backup_keep = 10
+    # Letra de unidade -> é unidade de rede mapeada? (ver _is_network_drive)
+    _network_drive_cache: dict[str, bool] = {}
+    
+    def __init__(self, parent: Optional[QWidget] = None, toast_cb: Optional[Callable[[str], None]] = None, backup_cb: Optional[Callable[[], None]] = None) -> None:
+        super().__init__(parent)
+        self.toast_cb = toast_cb
+        self.backup_cb = backup_cb
+        # None = ainda não verificado; refresh_db_status define True/False
+        self._db_connected: Optional[bool] = None
+        # QFileDialog não nativo, criado na primeira seleção e reaproveitado
+        self._file_dialog: Optional[QFileDialog] = None
+        # Caminho do banco memorizado; zerado a cada set_database_path
+        self._cached_path: Optional[str] = None
+        # Conexão reaproveitada pelas verificações de status (ver _get_conn)
+        self._db_conn: Optional[sqlite3.Connection] = None
+        self._status_probe: Optional[DbStatusProbe] = None
+        self._git_fetch_worker: Optional[GitFetchWorker] = None
+        self.setObjectName("DatabaseDialog")
+        self.setWindowTitle("Gerenciamento de Banco de Dados")
+        self.setMinimumSize(700, 600)
+        self.setModal(True)
+        
+        # Detecta o tema atual
+        theme = self._current_theme()
         
         # Layout principal
         main_layout = QVBoxLayout(self)
@@ -4841,310 +5980,255 @@ class DatabaseDialog(QDialog):
         
         # Título
         title = QLabel("🗄️ Banco de Dados")
-        title.setStyleSheet(f"font-size: 20px; font-weight: bold; margin-bottom: 8px; color: {text_main};")
+        title.setObjectName("DbDialogTitle")
         main_layout.addWidget(title)
         
-        # Área de scroll para o conteúdo
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setFrameShape(QFrame.Shape.NoFrame)
-        scroll.setStyleSheet(f"QScrollArea {{ background: transparent; border: none; }}")
-        
-        content = QWidget()
-        content.setStyleSheet(f"QWidget {{ background: transparent; }}")
-        content_layout = QVBoxLayout(content)
-        content_layout.setSpacing(20)
-        
-        # === Seção: Caminho Atual ===
-        path_group = QFrame()
-        path_group.setObjectName("SettingsGroup")
-        path_group.setStyleSheet(f"""
-            QFrame#SettingsGroup {{
-                background: {bg_group};
-                border-radius: 8px;
-                padding: 12px;
-            }}
-        """)
-        path_layout = QVBoxLayout(path_group)
+        # Abas construídas sob demanda: só a primeira é montada na abertura
+        self.tabs = QTabWidget()
+        self._builders: dict[int, Callable[[QWidget], None]] = {}
+        for label, builder in (
+            ("Caminho", self._build_path_tab),
+            ("Ações", self._build_actions_tab),
+            ("Status", self._build_status_tab),
+            ("Backup", self._build_backup_tab),
+        ):
+            index = self.tabs.addTab(QWidget(), label)
+            self._builders[index] = builder
+        cast(Any, self.tabs.currentChanged).connect(self._ensure_tab_built)
+        main_layout.addWidget(self.tabs)
+        
+        # Aviso
+        warning = QLabel("⚠️ Após alterar o banco de dados, reinicie o sistema para aplicar as mudanças.")
+        warning.setObjectName("DbWarning")
+        warning.setWordWrap(True)
+        main_layout.addWidget(warning)
+        
+        # Botão Fechar
+        close_button = QPushButton("Fechar")
+        close_button.setObjectName("btnClose")
+        close_button.setMinimumHeight(36)
+        
+        cast(Any, close_button.clicked).connect(self.accept)
+        main_layout.addWidget(close_button, alignment=Qt.AlignmentFlag.AlignRight)
+        
+        self._ensure_tab_built(self.tabs.currentIndex())
+        
+        # Uma única folha de estilo para o diálogo inteiro (cacheada por tema),
+        # aplicada só depois da árvore montada para o polish rodar uma vez
+        self.setStyleSheet(_DB_DIALOG_QSS.get(theme, _DB_DIALOG_QSS["light"]))
+    
+    def _ensure_tab_built(self, index: int) -> None:
+        """Monta o conteúdo da aba na primeira vez que ela é exibida"""
+        builder = self._builders.pop(index, None)
+        page = self.tabs.widget(index)
+        if builder is None or page is None:
+            return
+        page_layout = QVBoxLayout(page)
+        page_layout.setContentsMargins(0, 12, 0, 0)
+        # Monta o grupo fora da árvore e só então o insere na página,
+        # para que o estilo do diálogo seja resolvido uma única vez
+        group = QFrame()
+        group.setObjectName("SettingsGroup")
+        builder(group)
+        page_layout.addWidget(group)
+        page_layout.addStretch()
+    
+    def _build_path_tab(self, group: QWidget) -> None:
+        """Seção: Caminho Atual"""
+        path_layout = QVBoxLayout(group)
         
         path_title = QLabel("<b>Caminho Atual</b>")
-        path_title.setStyleSheet(f"font-size: 14px; color: {text_main};")
+        path_title.setObjectName("DbGroupTitle")
         path_layout.addWidget(path_title)
         
         self.db_path_label = QLabel()
+        self.db_path_label.setObjectName("DbPathLabel")
         self.db_path_label.setWordWrap(True)
-        self.db_path_label.setStyleSheet(f"color: {text_secondary}; padding: 8px; font-family: monospace; font-size: 12px;")
         path_layout.addWidget(self.db_path_label)
         
-        content_layout.addWidget(path_group)
-        
-        # === Seção: Ações ===
-        actions_group = QFrame()
-        actions_group.setObjectName("SettingsGroup")
-        actions_group.setStyleSheet(f"""
-            QFrame#SettingsGroup {{
-                background: {bg_group};
-                border-radius: 8px;
-                padding: 12px;
-            }}
-        """)
-        actions_layout = QVBoxLayout(actions_group)
+        self.update_db_path_label()
+    
+    def _build_actions_tab(self, group: QWidget) -> None:
+        """Seção: Ações"""
+        actions_layout = QVBoxLayout(group)
         
         actions_title = QLabel("<b>Ações</b>")
-        actions_title.setStyleSheet(f"font-size: 14px; margin-bottom: 8px; color: {text_main};")
+        actions_title.setObjectName("DbGroupTitle")
         actions_layout.addWidget(actions_title)
         
         # Botões de ação
         buttons_layout = QVBoxLayout()
         buttons_layout.setSpacing(12)
         
-        self.btn_select_db = QPushButton("📂 Selecionar Banco de Dados")
-        self.btn_create_new_db = QPushButton("➕ Criar Novo Banco")
-        self.btn_connect_network = QPushButton("🌐 Conectar a Rede")
-        
-        btn_style = f"""
-            QPushButton {{
-                background: {btn_bg};
-                color: {text_main if not is_dark else 'white'};
-                border: none;
-                border-radius: 8px;
-                padding: 10px 16px;
-                font-size: 14px;
-                font-weight: 500;
-                text-align: left;
-            }}
-            QPushButton:hover {{
-                background: {btn_hover};
-            }}
-            QPushButton:pressed {{
-                background: {btn_pressed};
-            }}
-        """
+        self.btn_select_db = QPushButton(_emoji_icon("📂"), " Selecionar Banco de Dados")
+        self.btn_create_new_db = QPushButton(_emoji_icon("➕"), " Criar Novo Banco")
+        self.btn_connect_network = QPushButton(_emoji_icon("🌐"), " Conectar a Rede")
         
         for btn in [self.btn_select_db, self.btn_create_new_db, self.btn_connect_network]:
+            btn.setObjectName("DbActionButton")
             btn.setMinimumHeight(40)
-            btn.setStyleSheet(btn_style)
             buttons_layout.addWidget(btn)
         
         actions_layout.addLayout(buttons_layout)
-        content_layout.addWidget(actions_group)
-        
-        # === Seção: Status ===
-        status_group = QFrame()
-        status_group.setObjectName("SettingsGroup")
-        status_group.setStyleSheet(f"""
-            QFrame#SettingsGroup {{
-                background: {bg_group};
-                border-radius: 8px;
-                padding: 12px;
-            }}
-        """)
-        status_layout = QVBoxLayout(status_group)
+        
+        for btn, slot in (
+            (self.btn_select_db, self.select_database),
+            (self.btn_create_new_db, self.create_new_database),
+            (self.btn_connect_network, self.connect_to_network),
+        ):
+            cast(Any, btn.clicked).connect(slot)
+    
+    def _build_status_tab(self, group: QWidget) -> None:
+        """Seção: Status"""
+        status_layout = QVBoxLayout(group)
         
         status_title = QLabel("<b>Status do Banco</b>")
-        status_title.setStyleSheet(f"font-size: 14px; margin-bottom: 8px; color: {text_main};")
+        status_title.setObjectName("DbGroupTitle")
         status_layout.addWidget(status_title)
         
         self.db_status_label = QLabel()
+        self.db_status_label.setObjectName("DbStatusLabel")
         self.db_status_label.setWordWrap(True)
-        status_bg = "rgba(0,0,0,0.1)" if not is_dark else "rgba(255,255,255,0.05)"
-        self.db_status_label.setStyleSheet(f"color: {text_secondary}; padding: 8px; background: {status_bg}; border-radius: 4px; font-size: 12px;")
         status_layout.addWidget(self.db_status_label)
         
         # Botões de status
         status_buttons = QHBoxLayout()
-        self.btn_check_status = QPushButton("🔍 Verificar Status")
-        self.btn_test_shared = QPushButton("🔗 Testar Modo Compartilhado")
-        
-        status_btn_style = f"""
-            QPushButton {{
-                background: {btn_bg};
-                color: {text_main if not is_dark else 'white'};
-                border: none;
-                border-radius: 8px;
-                padding: 8px 14px;
-                font-size: 13px;
-            }}
-            QPushButton:hover {{
-                background: {btn_hover};
-            }}
-            QPushButton:pressed {{
-                background: {btn_pressed};
-            }}
-        """
+        self.btn_check_status = QPushButton(_emoji_icon("🔍"), " Verificar Status")
+        self.btn_test_shared = QPushButton(_emoji_icon("🔗"), " Testar Modo Compartilhado")
         
         for btn in [self.btn_check_status, self.btn_test_shared]:
+            btn.setObjectName("DbStatusButton")
             btn.setMinimumHeight(36)
-            btn.setStyleSheet(status_btn_style)
             status_buttons.addWidget(btn)
         
         status_layout.addLayout(status_buttons)
-        content_layout.addWidget(status_group)
         
-        # === Seção: Backup ===
-        backup_group = QFrame()
-        backup_group.setObjectName("SettingsGroup")
-        backup_group.setStyleSheet(f"""
-            QFrame#SettingsGroup {{
-                background: {bg_group};
-                border-radius: 8px;
-                padding: 12px;
-            }}
-        """)
-        backup_layout = QVBoxLayout(backup_group)
+        for btn, slot in (
+            (self.btn_check_status, self.refresh_db_status),
+            (self.btn_test_shared, self.test_shared_mode),
+        ):
+            cast(Any, btn.clicked).connect(slot)
+        
+        self.refresh_db_status()
+    
+    def _build_backup_tab(self, group: QWidget) -> None:
+        """Seção: Backup"""
+        backup_layout = QVBoxLayout(group)
         
         backup_title = QLabel("<b>Backup</b>")
-        backup_title.setStyleSheet(f"font-size: 14px; margin-bottom: 8px; color: {text_main};")
+        backup_title.setObjectName("DbGroupTitle")
         backup_layout.addWidget(backup_title)
         
         # Botão de automação
-        self.btn_config_auto_backup = QPushButton("⚙️ Configurar Automação do Backup")
+        self.btn_config_auto_backup = QPushButton(_emoji_icon("⚙️"), " Configurar Automação do Backup")
+        self.btn_config_auto_backup.setObjectName("btnConfigAutoBackup")
         self.btn_config_auto_backup.setMinimumHeight(40)
-        btn_config_bg = "#8b5cf6" if not is_dark else "#7c3aed"
-        btn_config_hover = "#7c3aed" if not is_dark else "#6d28d9"
-        self.btn_config_auto_backup.setStyleSheet(f"""
-            QPushButton {{
-                background: {btn_config_bg};
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 10px 18px;
-                font-size: 14px;
-                font-weight: 500;
-            }}
-            QPushButton:hover {{
-                background: {btn_config_hover};
-            }}
-            QPushButton:pressed {{
-                background: #6d28d9;
-            }}
-        """)
         backup_layout.addWidget(self.btn_config_auto_backup)
         
-        self.btn_do_backup = QPushButton("💾 Fazer Backup Agora")
+        self.btn_do_backup = QPushButton(_emoji_icon("💾"), " Fazer Backup Agora")
+        self.btn_do_backup.setObjectName("btnDoBackup")
         self.btn_do_backup.setMinimumHeight(40)
-        self.btn_do_backup.setStyleSheet(f"""
-            QPushButton {{
-                background: {btn_primary};
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 10px 18px;
-                font-size: 14px;
-                font-weight: 500;
-            }}
-            QPushButton:hover {{
-                background: {btn_primary_hover};
-            }}
-            QPushButton:pressed {{
-                background: #1d4ed8;
-            }}
-        """)
         backup_layout.addWidget(self.btn_do_backup)
         
         # Botão para backup na nuvem
-        self.btn_cloud_backup = QPushButton("☁️ Fazer Backup na Nuvem Agora")
+        self.btn_cloud_backup = QPushButton(_emoji_icon("☁️"), " Fazer Backup na Nuvem Agora")
+        self.btn_cloud_backup.setObjectName("btnCloudBackup")
         self.btn_cloud_backup.setMinimumHeight(40)
-        btn_cloud_bg = "#10b981" if not is_dark else "#059669"
-        btn_cloud_hover = "#059669" if not is_dark else "#047857"
-        self.btn_cloud_backup.setStyleSheet(f"""
-            QPushButton {{
-                background: {btn_cloud_bg};
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 10px 18px;
-                font-size: 14px;
-                font-weight: 500;
-            }}
-            QPushButton:hover {{
-                background: {btn_cloud_hover};
-            }}
-            QPushButton:pressed {{
-                background: #047857;
-            }}
-        """)
         backup_layout.addWidget(self.btn_cloud_backup)
+        # Só aparece quando há um banco válido para enviar
+        if self._db_connected is None:
+            try:
+                self._db_connected = self._path_exists(self._current_path())
+            except Exception:
+                self._db_connected = False
+        self.btn_cloud_backup.setVisible(self._db_connected)
         
         # Botão para restaurar backup
-        self.btn_restore_backup = QPushButton("🔄 Restaurar Backup")
+        self.btn_restore_backup = QPushButton(_emoji_icon("🔄"), " Restaurar Backup")
+        self.btn_restore_backup.setObjectName("btnRestoreBackup")
         self.btn_restore_backup.setMinimumHeight(40)
-        btn_restore_bg = "#f59e0b" if not is_dark else "#d97706"
-        btn_restore_hover = "#d97706" if not is_dark else "#b45309"
-        self.btn_restore_backup.setStyleSheet(f"""
-            QPushButton {{
-                background: {btn_restore_bg};
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 10px 18px;
-                font-size: 14px;
-                font-weight: 500;
-            }}
-            QPushButton:hover {{
-                background: {btn_restore_hover};
-            }}
-            QPushButton:pressed {{
-                background: #b45309;
-            }}
-        """)
         backup_layout.addWidget(self.btn_restore_backup)
-        content_layout.addWidget(backup_group)
         
-        # Aviso
-        warning = QLabel("⚠️ Após alterar o banco de dados, reinicie o sistema para aplicar as mudanças.")
-        warning.setWordWrap(True)
-        warning.setStyleSheet(f"color: {warning_text}; padding: 12px; font-size: 13px; background: {warning_bg}; border-radius: 6px;")
-        content_layout.addWidget(warning)
-        
-        content_layout.addStretch()
-        scroll.setWidget(content)
-        main_layout.addWidget(scroll)
-        
-        # Botão Fechar
-        close_button = QPushButton("Fechar")
-        close_button.setMinimumHeight(36)
-        close_btn_bg = "#6b7280" if is_dark else "#9ca3af"
-        close_btn_hover = "#4b5563" if is_dark else "#6b7280"
-        close_button.setStyleSheet(f"""
-            QPushButton {{
-                background: {close_btn_bg};
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 8px 24px;
-                font-size: 14px;
-            }}
-            QPushButton:hover {{
-                background: {close_btn_hover};
-            }}
-        """)
-        cast(Any, close_button.clicked).connect(self.accept)
-        main_layout.addWidget(close_button, alignment=Qt.AlignmentFlag.AlignRight)
+        for btn, slot in (
+            (self.btn_config_auto_backup, self.configure_auto_backup),
+            (self.btn_do_backup, lambda: self.backup_cb() if self.backup_cb else None),
+            (self.btn_cloud_backup, self.do_cloud_backup_now),
+            (self.btn_restore_backup, self.restore_backup),
+        ):
+            cast(Any, btn.clicked).connect(slot)
+    
+    def _current_theme(self) -> str:
+        """Tema ativo: o da janela principal (MainWindow.current_theme); sem ele, o do config.yaml"""
+        theme = getattr(self.parent(), "current_theme", None)
+        if theme:
+            return theme
+        try:
+            from core.config import load_config
+            return load_config().get("theme", "light")
+        except Exception:
+            return "light"
+    
+    def _current_path(self) -> str:
+        """Caminho do banco configurado, lido uma vez por abertura do diálogo"""
+        if self._cached_path is None:
+            from core.config import get_database_path
+            self._cached_path = get_database_path()
+        return self._cached_path
+    
+    def _get_conn(self) -> sqlite3.Connection:
+        """Conexão com o banco atual, aberta uma vez por diálogo.
         
-        # Conectar eventos
-        cast(Any, self.btn_select_db.clicked).connect(self.select_database)
-        cast(Any, self.btn_create_new_db.clicked).connect(self.create_new_database)
-        cast(Any, self.btn_connect_network.clicked).connect(self.connect_to_network)
-        cast(Any, self.btn_check_status.clicked).connect(self.refresh_db_status)
-        cast(Any, self.btn_test_shared.clicked).connect(self.test_shared_mode)
-        cast(Any, self.btn_config_auto_backup.clicked).connect(self.configure_auto_backup)
-        cast(Any, self.btn_do_backup.clicked).connect(lambda: self.backup_cb() if self.backup_cb else None)
-        cast(Any, self.btn_cloud_backup.clicked).connect(self.do_cloud_backup_now)
-        cast(Any, self.btn_restore_backup.clicked).connect(self.restore_backup)
-        
-        # Atualizar labels
-        self.update_db_path_label()
-        self.refresh_db_status()
+        Abrir um banco em caminho UNC custa vários stat/open/lock pela rede,
+        então as verificações de status reaproveitam a mesma conexão.
+        """
+        if self._db_conn is None:
+            conn = sqlite3.connect(self._current_path(), timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._db_conn = conn
+        return self._db_conn
+    
+    def _invalidate_path(self) -> None:
+        """Esquece o caminho memorizado e fecha a conexão reaproveitada"""
+        self._cached_path = None
+        DatabaseDialog._network_drive_cache.clear()
+        if self._db_conn is not None:
+            try:
+                self._db_conn.close()
+            except Exception:
+                pass
+            self._db_conn = None
+    
+    def done(self, result: int) -> None:
+        # A verificação de status usa a conexão que vai ser fechada
+        if self._status_probe is not None:
+            self._status_probe.wait()
+        # Um fetch cancelado pode ainda estar encerrando o git
+        if self._git_fetch_worker is not None:
+            self._git_fetch_worker.cancel()
+            self._git_fetch_worker.wait()
+        self._invalidate_path()
+        super().done(result)
+    
+    @staticmethod
+    def _path_exists(path: str) -> bool:
+        """Existe? Um único stat (relevante em caminhos UNC)"""
+        if not path:
+            return False
+        try:
+            os.stat(path)
+        except OSError:
+            return False
+        return True
     
     def update_db_path_label(self) -> None:
         """Atualiza o label com o caminho do banco atual"""
+        label = getattr(self, 'db_path_label', None)
+        if label is None:
+            return
         try:
-            from core.config import get_database_path
-            path = get_database_path()
-            self.db_path_label.setText(path)
+            label.setText(self._current_path())
         except Exception as e:
-            self.db_path_label.setText(f"Erro: {e}")
+            label.setText(f"Erro: {e}")
     
     def select_database(self) -> None:
         """Seleciona um banco de dados existente"""
@@ -5169,123 +6253,53 @@ class DatabaseDialog(QDialog):
         use_native = (choice == 2)
         
         try:
-            from core.config import get_database_path, set_database_path, validate_database_path
+            from core.config import validate_database_path
             
             if use_native:
                 # Usa Explorer do Windows (melhor para rede)
                 if self.toast_cb:
                     self.toast_cb("Abrindo Explorer do Windows...")
                 
-                # Abre diálogo nativo do Windows
-                import subprocess
-                import tempfile
-                
-                # Cria um script VBS temporário para seleção de arquivo
-                vbs_code = '''
-Set objDialog = CreateObject("SAFRdialog.FileSave")
-objDialog.FileName = "confeitaria.db"
-objDialog.FileType = "Banco de Dados SQLite (*.db)"
-objDialog.Title = "Selecionar Banco de Dados"
-If objDialog.Show Then
-    WScript.Echo objDialog.FileName
-End If
-'''
                 # Usa QFileDialog com opção nativa
                 file_path, _ = QFileDialog.getOpenFileName(
                     self,
                     "Selecionar Banco de Dados - Confeitaria",
                     os.path.expanduser("~"),
-                    "Banco de Dados SQLite (*.db);;Todos os arquivos (*.*)",
-                    options=QFileDialog.Option.DontUseNativeDialog if not use_native else QFileDialog.Option(0)
+                    "Banco de Dados SQLite (*.db);;Todos os arquivos (*.*)"
                 )
             else:
-                # Usa diálogo Qt padrão (mais rápido para local)
-                current_db = get_database_path()
-                start_dir = os.path.dirname(current_db) if current_db and os.path.exists(current_db) else os.path.expanduser("~")
+                # Usa diálogo Qt reaproveitado (mais rápido para local)
+                current_db = self._current_path()
+                start_dir = os.path.dirname(current_db) if self._path_exists(current_db) else os.path.expanduser("~")
                 
-                file_path, _ = QFileDialog.getOpenFileName(
-                    self,
-                    "Selecionar Banco de Dados - Confeitaria",
-                    start_dir,
-                    "Banco de Dados SQLite (*.db);;Todos os arquivos (*.*)"
-                )
+                file_path = self._pick_db_file("Selecionar Banco de Dados - Confeitaria", start_dir)
             
             if not file_path:
                 return
             
-            # Valida o banco de dados de forma assíncrona
-            progress = QProgressDialog(
-                "Validando banco de dados...\n\nPor favor aguarde.",
-                "Cancelar",
-                0, 0,
-                self
-            )
-            progress.setWindowTitle("Confeitaria - Validação")
-            progress.setWindowModality(Qt.WindowModality.WindowModal)
-            progress.setMinimumDuration(0)
-            progress.show()
-            QApplication.processEvents()
-            
-            # Cria thread de validação
-            validator = AsyncDatabaseValidator(file_path, timeout=10)
-            
-            def on_complete(is_valid: bool, message: str, validated_path: str):
-                progress.close()
-                
-                if not is_valid:
-                    show_message(
-                        self,
-                        "Erro de Validação",
-                        f"O arquivo selecionado não é um banco de dados válido:\n\n{message}",
-                        ("OK",)
-                    )
+            # Arquivo local: confere o cabeçalho SQLite e, se for pequeno,
+            # valida na hora sem subir thread nem diálogo de progresso.
+            # Unidades mapeadas contam como rede: lá até um arquivo pequeno
+            # pode travar a GUI, então seguem para a thread de validação.
+            if not is_network_path(file_path):
+                try:
+                    size = os.path.getsize(file_path)
+                    if size:
+                        with open(file_path, 'rb') as f:
+                            head = f.read(len(_SQLITE_MAGIC))
+                        if head != _SQLITE_MAGIC:
+                            self._apply_selected_database(False, "O arquivo não começa com o cabeçalho SQLite.", file_path)
+                            return
+                except OSError as e:
+                    self._apply_selected_database(False, str(e), file_path)
+                    return
+                if size < 1024 * 1024:
+                    is_valid, message = validate_database_path(file_path)
+                    self._apply_selected_database(is_valid, message, file_path)
                     return
-                
-                # Salva a configuração
-                if set_database_path(validated_path):
-                    self.update_db_path_label()
-                    self.refresh_db_status()
-                    
-                    restart = show_message(
-                        self,
-                        "Configuração Atualizada",
-                        f"Banco de dados configurado com sucesso!\n\n📁 {validated_path}\n\n🔄 É necessário reiniciar o aplicativo para aplicar as mudanças.\n\nDeseja reiniciar agora?",
-                        ("Mais Tarde", "Reiniciar Agora"),
-                        default=1
-                    )
-                    
-                    if restart == 1:
-                        if self.toast_cb:
-                            self.toast_cb("Reiniciando aplicativo...")
-                        QTimer.singleShot(1000, lambda: self._restart_application())
-                    else:
-                        if self.toast_cb:
-                            self.toast_cb("⚠️ Reinicie o aplicativo para aplicar as mudanças!")
-                else:
-                    show_message(
-                        self,
-                        "Erro",
-                        "Não foi possível salvar a configuração de banco.\n\nVerifique as permissões do sistema.",
-                        ("OK",)
-                    )
-            
-            def on_progress(msg: str):
-                progress.setLabelText(f"Validando banco de dados...\n\n{msg}")
-                QApplication.processEvents()
-            
-            def on_cancel():
-                validator.stop()
-                validator.quit()
-                validator.wait(1000)
-                progress.close()
-                if self.toast_cb:
-                    self.toast_cb("❌ Validação cancelada")
-            
-            cast(Any, validator.finished).connect(on_complete)
-            cast(Any, validator.progress).connect(on_progress)
-            cast(Any, progress.canceled).connect(on_cancel)
             
-            validator.start()
+            # Rede ou arquivo grande: valida de forma assíncrona
+            self._validate_in_background(file_path, 10, self._apply_selected_database)
             
         except Exception as e:
             show_message(
@@ -5295,58 +6309,141 @@ End If
                 ("OK",)
             )
     
-    def _restart_application(self) -> None:
-        """Reinicia o aplicativo"""
-        try:
-            import subprocess
-            import sys
-            
-            # Fecha o servidor web para evitar erro de thread
-            try:
-                if hasattr(self, 'web_thread') and self.web_thread:
-                    print("Finalizando servidor web...")
-                    # Não espera, apenas fecha
-            except Exception:
-                pass
-            
-            # Pega o executável atual
-            if getattr(sys, 'frozen', False):
-                # Executável PyInstaller
-                executable = sys.executable
-                script = None
+    def _validate_in_background(self, file_path: str, timeout: float,
+                                on_complete: Callable[[bool, str, str], None]) -> None:
+        """Valida o banco no AsyncDatabaseValidator, com diálogo de progresso e cancelamento.
+        
+        on_complete(is_valid, message, validated_path) roda no thread da GUI.
+        """
+        progress = QProgressDialog(
+            "Validando banco de dados...\n\nPor favor aguarde.",
+            "Cancelar",
+            0, 0,
+            self
+        )
+        progress.setWindowTitle("Confeitaria - Validação")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        # Só aparece se a validação passar de 250 ms (setValue arma o timer)
+        progress.setMinimumDuration(250)
+        progress.setValue(0)
+        
+        # Cria thread de validação
+        validator = AsyncDatabaseValidator(file_path, timeout=timeout)
+        
+        def on_cancel():
+            validator.stop()
+            validator.quit()
+            validator.wait(1000)
+            progress.close()
+            if self.toast_cb:
+                self.toast_cb("❌ Validação cancelada")
+        
+        def on_validated(is_valid: bool, message: str, validated_path: str):
+            # close() emite canceled; desconecta antes para não cair em on_cancel
+            cast(Any, progress.canceled).disconnect(on_cancel)
+            progress.close()
+            on_complete(is_valid, message, validated_path)
+        
+        def on_progress(msg: str):
+            progress.setLabelText(f"Validando banco de dados...\n\n{msg}")
+        
+        cast(Any, validator.finished).connect(on_validated)
+        cast(Any, validator.progress).connect(on_progress)
+        cast(Any, progress.canceled).connect(on_cancel)
+        
+        validator.start()
+    
+    def _pick_db_file(self, title: str, start_dir: str, save_name: Optional[str] = None) -> str:
+        """Abre o QFileDialog reaproveitado do diálogo (abrir, ou salvar se save_name)
+        e retorna o caminho escolhido ('' se cancelado).
+        
+        O ramo "Rede" de select_database continua usando o diálogo nativo,
+        que navega melhor por caminhos UNC.
+        """
+        dlg = self._file_dialog
+        if dlg is None:
+            dlg = QFileDialog(self)
+            dlg.setOption(QFileDialog.Option.DontUseNativeDialog, True)
+            # A confirmação de sobrescrita é feita por create_new_database
+            dlg.setOption(QFileDialog.Option.DontConfirmOverwrite, True)
+            dlg.setNameFilters(["Banco de Dados SQLite (*.db)", "Todos os arquivos (*.*)"])
+            self._file_dialog = dlg
+        
+        dlg.setWindowTitle(title)
+        dlg.setDirectory(start_dir)
+        if save_name:
+            dlg.setAcceptMode(QFileDialog.AcceptMode.AcceptSave)
+            dlg.setFileMode(QFileDialog.FileMode.AnyFile)
+            dlg.selectFile(save_name)
+        else:
+            dlg.setAcceptMode(QFileDialog.AcceptMode.AcceptOpen)
+            dlg.setFileMode(QFileDialog.FileMode.ExistingFile)
+            dlg.selectFile("")
+        
+        if not dlg.exec():
+            return ""
+        files = dlg.selectedFiles()
+        return files[0] if files else ""
+    
+    def _apply_selected_database(self, is_valid: bool, message: str, validated_path: str) -> None:
+        """Salva o banco escolhido (ou mostra o erro de validação) e oferece reiniciar"""
+        from core.config import set_database_path
+        
+        if not is_valid:
+            show_message(
+                self,
+                "Erro de Validação",
+                f"O arquivo selecionado não é um banco de dados válido:\n\n{message}",
+                ("OK",)
+            )
+            return
+        
+        # Salva a configuração
+        if set_database_path(validated_path):
+            self._invalidate_path()
+            self.update_db_path_label()
+            self.refresh_db_status()
+        
+            restart = show_message(
+                self,
+                "Configuração Atualizada",
+                f"Banco de dados configurado com sucesso!\n\n📁 {validated_path}\n\n🔄 É necessário reiniciar o aplicativo para aplicar as mudanças.\n\nDeseja reiniciar agora?",
+                ("Mais Tarde", "Reiniciar Agora"),
+                default=1
+            )
+        
+            if restart == 1:
+                if self.toast_cb:
+                    self.toast_cb("Reiniciando aplicativo...")
+                QTimer.singleShot(1000, lambda: self._restart_application())
             else:
-                # Modo desenvolvimento
-                executable = sys.executable
-                script = sys.argv[0]
-            
-            # Inicia novo processo
-            if getattr(sys, 'frozen', False):
-                # PyInstaller: apenas executa o .exe
-                subprocess.Popen([executable], 
-                               creationflags=subprocess.CREATE_NEW_CONSOLE if sys.platform == 'win32' else 0)
-            elif script:
-                # Desenvolvimento: python script.py
-                subprocess.Popen([executable, script],
-                               creationflags=subprocess.CREATE_NEW_CONSOLE if sys.platform == 'win32' else 0)
-            
-            print("Novo processo iniciado. Fechando aplicação atual...")
-            
-            # Fecha a aplicação atual com delay
-            QTimer.singleShot(500, lambda: QApplication.instance().quit())
-            
-        except Exception as e:
-            print(f"Erro ao reiniciar: {e}")
+                if self.toast_cb:
+                    self.toast_cb("⚠️ Reinicie o aplicativo para aplicar as mudanças!")
+        else:
             show_message(
                 self,
-                "Erro ao Reiniciar",
-                f"Não foi possível reiniciar automaticamente:\n\n{e}\n\nPor favor, reinicie manualmente o aplicativo.",
+                "Erro",
+                "Não foi possível salvar a configuração de banco.\n\nVerifique as permissões do sistema.",
                 ("OK",)
             )
     
+    def _restart_application(self) -> None:
+        """Pede o reinício do aplicativo.
+        
+        Só encerra o loop de eventos; o relançamento acontece em main(), depois
+        que as janelas, threads e conexões foram fechadas (ver _restart_process).
+        """
+        app = QApplication.instance()
+        if app is None:
+            return
+        print("Reiniciando aplicação...")
+        app.setProperty("restart_requested", True)
+        app.quit()
+    
     def create_new_database(self) -> None:
         """Cria um novo banco de dados"""
         try:
-            from core.config import set_database_path, validate_database_path, get_app_data_directory
+            from core.config import validate_database_path, get_app_data_directory
             
             # Sugere o diretório de dados da aplicação
             try:
@@ -5355,19 +6452,18 @@ End If
                 start_dir = os.path.expanduser("~")
             
             # Pede ao usuário para escolher onde salvar o novo banco
-            file_path, _ = QFileDialog.getSaveFileName(
-                self,
+            file_path = self._pick_db_file(
                 "Criar Novo Banco de Dados - Confeitaria",
-                os.path.join(start_dir, "confeitaria_novo.db"),
-                "Banco de Dados SQLite (*.db);;Todos os arquivos (*.*)"
+                start_dir,
+                save_name="confeitaria_novo.db"
             )
             
             if not file_path:
                 return
             
             # Garante que termina com .db
-            if not file_path.lower().endswith('.db'):
-                file_path += '.db'
+            if not file_path.casefold().endswith(_DB_EXT):
+                file_path += _DB_EXT
             
             # Verifica se o arquivo já existe
             if os.path.exists(file_path):
@@ -5397,63 +6493,16 @@ End If
                 import sqlite3
                 conn = sqlite3.connect(file_path)
                 conn.close()
-                
-                # Valida
-                is_valid, message = validate_database_path(file_path)
-                if not is_valid:
-                    show_message(
-                        self,
-                        "Erro",
-                        f"Falha ao criar banco válido:\n\n{message}",
-                        ("OK",)
-                    )
-                    try:
-                        os.remove(file_path)
-                    except Exception:
-                        pass
-                    return
-                
-                # Salva nas configurações
-                if set_database_path(file_path):
-                    self.update_db_path_label()
-                    self.refresh_db_status()
-                    
-                    restart = show_message(
-                        self,
-                        "Banco Criado",
-                        f"Novo banco de dados criado com sucesso!\n\n📁 {file_path}\n\n"
-                        f"🔄 É necessário reiniciar o aplicativo para usar o novo banco.\n\n"
-                        f"Deseja reiniciar agora?",
-                        ("Mais Tarde", "Reiniciar Agora"),
-                        default=1
-                    )
-                    
-                    if restart == 1:
-                        if self.toast_cb:
-                            self.toast_cb("Reiniciando aplicativo...")
-                        QTimer.singleShot(1000, lambda: self._restart_application())
-                    else:
-                        if self.toast_cb:
-                            self.toast_cb("⚠️ Reinicie o aplicativo para usar o novo banco!")
-                else:
-                    show_message(
-                        self,
-                        "Erro",
-                        "Não foi possível salvar a configuração.\n\nVerifique as permissões do sistema.",
-                        ("OK",)
-                    )
             except Exception as e:
-                show_message(
-                    self,
-                    "Erro",
-                    f"Erro ao criar banco de dados:\n\n{e}",
-                    ("OK",)
-                )
-                try:
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                except Exception:
-                    pass
+                self._finish_created_database(False, str(e), file_path)
+                return
+            
+            # Valida (em unidade de rede, fora do thread da GUI)
+            if is_network_path(file_path):
+                self._validate_in_background(file_path, 20, self._finish_created_database)
+            else:
+                is_valid, message = validate_database_path(file_path)
+                self._finish_created_database(is_valid, message, file_path)
         except Exception as e:
             show_message(
                 self,
@@ -5462,6 +6511,55 @@ End If
                 ("OK",)
             )
     
+    def _finish_created_database(self, is_valid: bool, message: str, file_path: str) -> None:
+        """Salva o banco recém-criado e oferece reiniciar; remove o arquivo se a validação falhou"""
+        from core.config import set_database_path
+        
+        if not is_valid:
+            show_message(
+                self,
+                "Erro",
+                f"Falha ao criar banco válido:\n\n{message}",
+                ("OK",)
+            )
+            try:
+                # Remove o banco incompleto junto com -wal/-shm que tenham ficado
+                _remove_db_files(file_path)
+            except Exception:
+                pass
+            return
+        
+        # Salva nas configurações
+        if set_database_path(file_path):
+            self._invalidate_path()
+            self.update_db_path_label()
+            self.refresh_db_status()
+            
+            restart = show_message(
+                self,
+                "Banco Criado",
+                f"Novo banco de dados criado com sucesso!\n\n📁 {file_path}\n\n"
+                f"🔄 É necessário reiniciar o aplicativo para usar o novo banco.\n\n"
+                f"Deseja reiniciar agora?",
+                ("Mais Tarde", "Reiniciar Agora"),
+                default=1
+            )
+            
+            if restart == 1:
+                if self.toast_cb:
+                    self.toast_cb("Reiniciando aplicativo...")
+                QTimer.singleShot(1000, lambda: self._restart_application())
+            else:
+                if self.toast_cb:
+                    self.toast_cb("⚠️ Reinicie o aplicativo para usar o novo banco!")
+        else:
+            show_message(
+                self,
+                "Erro",
+                "Não foi possível salvar a configuração.\n\nVerifique as permissões do sistema.",
+                ("OK",)
+            )
+    
     def connect_to_network(self) -> None:
         """Conecta a um banco em rede"""
         try:
@@ -5487,12 +6585,12 @@ End If
             
             network_path = network_path.strip()
             
-            # Valida formato UNC
-            if not network_path.startswith("\\\\"):
+            # Valida formato UNC (servidor, compartilhamento e arquivo .db)
+            if not _UNC_DB_RE.match(network_path):
                 show_message(
                     self,
                     "Formato Inválido",
-                    "O caminho deve começar com \\\\ (formato UNC).\n\n"
+                    "O caminho deve estar no formato UNC (\\\\servidor\\compartilhamento\\arquivo.db).\n\n"
                     "Exemplo correto:\n\\\\NOME_PC\\Compartilhamento\\confeitaria.db",
                     ("OK",)
                 )
@@ -5545,9 +6643,9 @@ End If
             progress.setWindowModality(Qt.WindowModality.WindowModal)
             progress.setMinimumDuration(0)
             progress.show()
-            QApplication.processEvents()
             
-            # Cria thread de validação (timeout de 20s para rede)
+            # Cria thread de validação (timeout de 20s para rede).
+            # Os sinais da thread chegam enfileirados ao thread da GUI.
             validator = AsyncDatabaseValidator(network_path, timeout=20)
             
             def on_network_complete(is_valid: bool, message: str, validated_path: str):
@@ -5565,6 +6663,7 @@ End If
                 
                 # Salva a configuração
                 if set_database_path(validated_path):
+                    self._invalidate_path()
                     self.update_db_path_label()
                     self.refresh_db_status()
                     
@@ -5598,7 +6697,6 @@ End If
             
             def on_network_progress(msg: str):
                 progress.setLabelText(f"Validando banco de dados em rede...\n\n{msg}")
-                QApplication.processEvents()
             
             def on_network_cancel():
                 validator.stop()
@@ -5622,142 +6720,57 @@ End If
                 ("OK",)
             )
     
+    def _set_db_connected(self, connected: bool) -> None:
+        """Guarda o resultado da verificação e mostra/oculta o backup na nuvem"""
+        self._db_connected = connected
+        btn = getattr(self, 'btn_cloud_backup', None)
+        if btn is not None:
+            btn.setVisible(connected)
+    
     def refresh_db_status(self) -> None:
-        """Atualiza o status do banco com informações detalhadas"""
-        try:
-            from core.config import get_database_path
-            import sqlite3
-            
-            # Toast de feedback
-            if self.toast_cb:
-                self.toast_cb("🔍 Verificando status do banco...")
-            
-            db_path = get_database_path()
-            
-            if not db_path or not os.path.exists(db_path):
-                self.db_status_label.setText("❌ Banco de dados não encontrado")
-                if self.toast_cb:
-                    self.toast_cb("❌ Banco não encontrado")
-                return
-            
-            # Informações básicas
-            status_lines = []
-            
-            # 1. Tamanho do arquivo
-            try:
-                size_bytes = os.path.getsize(db_path)
-                size_mb = size_bytes / (1024 * 1024)
-                status_lines.append(f"📊 Tamanho: {size_mb:.2f} MB ({size_bytes:,} bytes)")
-            except Exception as e:
-                status_lines.append(f"📊 Tamanho: Erro ao obter ({e})")
-            
-            # 2. Modo de journaling (WAL é melhor para concorrência)
-            try:
-                conn = sqlite3.connect(db_path, timeout=5)
-                cursor = conn.cursor()
-                
-                # Journal mode
-                cursor.execute("PRAGMA journal_mode")
-                mode = cursor.fetchone()[0]
-                mode_emoji = "✅" if mode.upper() == "WAL" else "⚠️"
-                status_lines.append(f"{mode_emoji} Modo Journal: {mode}")
-                
-                # Conta registros
-                try:
-                    cursor.execute("SELECT COUNT(*) FROM customers")
-                    customers = cursor.fetchone()[0]
-                    cursor.execute("SELECT COUNT(*) FROM products")
-                    products = cursor.fetchone()[0]
-                    cursor.execute("SELECT COUNT(*) FROM orders")
-                    orders = cursor.fetchone()[0]
-                    
-                    status_lines.append(f"👥 Clientes: {customers}")
-                    status_lines.append(f"🍰 Produtos: {products}")
-                    status_lines.append(f"📦 Pedidos: {orders}")
-                except Exception:
-                    pass
-                
-                conn.close()
-            except Exception as e:
-                status_lines.append(f"📝 Modo: Erro ao conectar ({str(e)[:30]}...)")
-            
-            # 3. Localização e tipo
-            is_network = False
-            if db_path.startswith("\\\\"):
-                status_lines.append("🌐 Localização: Rede (UNC)")
-                is_network = True
-            elif len(db_path) > 1 and db_path[1] == ':' and self._is_network_drive(db_path[0]):
-                status_lines.append("🌐 Localização: Unidade de Rede Mapeada")
-                is_network = True
-            else:
-                status_lines.append("💻 Localização: Disco Local")
-            
-            # 4. Permissões de acesso
-            try:
-                # Testa leitura
-                can_read = os.access(db_path, os.R_OK)
-                # Testa escrita
-                can_write = os.access(db_path, os.W_OK)
-                
-                if can_read and can_write:
-                    status_lines.append("🔓 Permissões: Leitura e Escrita ✅")
-                elif can_read:
-                    status_lines.append("⚠️ Permissões: Apenas Leitura")
-                else:
-                    status_lines.append("❌ Permissões: Sem Acesso")
-            except Exception:
-                status_lines.append("🔒 Permissões: Não verificado")
-            
-            # 5. Data de modificação
-            try:
-                mtime = os.path.getmtime(db_path)
-                mod_date = datetime.fromtimestamp(mtime)
-                now = datetime.now()
-                diff = now - mod_date
-                
-                if diff.total_seconds() < 60:
-                    time_str = "agora há pouco"
-                elif diff.total_seconds() < 3600:
-                    mins = int(diff.total_seconds() / 60)
-                    time_str = f"há {mins} minuto{'s' if mins > 1 else ''}"
-                elif diff.total_seconds() < 86400:
-                    hours = int(diff.total_seconds() / 3600)
-                    time_str = f"há {hours} hora{'s' if hours > 1 else ''}"
-                else:
-                    days = diff.days
-                    time_str = f"há {days} dia{'s' if days > 1 else ''}"
-                
-                status_lines.append(f"🕐 Modificado: {time_str}")
-            except Exception:
-                pass
-            
-            # Atualiza o label
-            self.db_status_label.setText("\n".join(status_lines))
-            
-            # Toast de sucesso
-            if self.toast_cb:
-                if is_network:
-                    self.toast_cb("✅ Status verificado: Banco em rede")
-                else:
-                    self.toast_cb("✅ Status verificado: Banco local")
-            
-        except Exception as e:
-            error_msg = f"❌ Erro ao verificar status:\n{str(e)}"
-            self.db_status_label.setText(error_msg)
-            if self.toast_cb:
-                self.toast_cb(f"❌ Erro: {str(e)[:50]}")
+        """Atualiza o status do banco com informações detalhadas (coletadas em DbStatusProbe)"""
+        # Aba de status ainda não foi montada: nada a atualizar
+        if getattr(self, 'db_status_label', None) is None:
+            return
+        # Já existe uma verificação em andamento
+        if self._status_probe is not None and self._status_probe.isRunning():
+            return
+        
+        # Toast de feedback
+        if self.toast_cb:
+            self.toast_cb("🔍 Verificando status do banco...")
+        self.db_status_label.setText("⏳ Verificando status do banco...")
+        
+        probe = DbStatusProbe(self._current_path(), self._get_conn, self._is_network_drive, self.use_counts_table)
+        cast(Any, probe.result).connect(self._on_db_status)
+        self._status_probe = probe
+        probe.start()
+    
+    def _on_db_status(self, status_text: str, kind: str) -> None:
+        """Recebe o resultado de DbStatusProbe no thread da GUI"""
+        self.db_status_label.setText(status_text)
+        self._set_db_connected(kind in ("local", "network"))
+        
+        if not self.toast_cb:
+            return
+        if kind == "missing":
+            self.toast_cb("❌ Banco não encontrado")
+        elif kind == "error":
+            self.toast_cb(f"❌ Erro: {status_text.splitlines()[-1][:50]}")
+        elif kind == "network":
+            self.toast_cb("✅ Status verificado: Banco em rede")
+        else:
+            self.toast_cb("✅ Status verificado: Banco local")
     
     def test_shared_mode(self) -> None:
         """Testa o modo compartilhado com múltiplas conexões simultâneas"""
         try:
-            from core.config import get_database_path
             import sqlite3
-            import threading
-            import time
+            from concurrent.futures import ThreadPoolExecutor
             
-            db_path = get_database_path()
+            db_path = self._current_path()
             
-            if not db_path or not os.path.exists(db_path):
+            if not self._path_exists(db_path):
                 show_message(
                     self,
                     "Erro",
@@ -5779,7 +6792,6 @@ End If
             progress.setMinimumDuration(0)
             progress.setValue(0)
             progress.show()
-            QApplication.processEvents()
             
             results = []
             errors = []
@@ -5788,8 +6800,8 @@ End If
             def test_connection(conn_id: int):
                 """Testa uma conexão individual"""
                 try:
+                    # WAL já é persistido no banco (set_database_path / abertura do app)
                     conn = sqlite3.connect(db_path, timeout=10)
-                    conn.execute("PRAGMA journal_mode=WAL")
                     
                     # Simula operação de leitura
                     cursor = conn.cursor()
@@ -5822,50 +6834,58 @@ End If
             
             # Testa 5 conexões simultâneas
             num_connections = 5
-            threads = []
+            
+            # Inicia as conexões de teste em paralelo
+            executor = ThreadPoolExecutor(max_workers=num_connections)
+            futures = [executor.submit(test_connection, i + 1) for i in range(num_connections)]
             
             progress.setLabelText(
                 f"Testando modo compartilhado...\n\n"
-                f"Criando {num_connections} conexões simultâneas..."
+                f"Aguardando resposta das {num_connections} conexões..."
             )
             progress.setValue(10)
-            QApplication.processEvents()
             
-            if test_cancelled[0]:
-                progress.close()
-                return
+            # O progresso é atualizado por um QTimer (~30 Hz) a partir das
+            # conexões concluídas, sem bombear o loop de eventos manualmente
+            deadline = time.monotonic() + 25
+            timer = QTimer(self)
+            timer.setInterval(33)
             
-            # Inicia threads de teste
-            for i in range(num_connections):
+            def on_tick():
+                done_count = sum(f.done() for f in futures)
+                progress.setValue(10 + done_count * 18)
+                if not (test_cancelled[0] or done_count == num_connections or time.monotonic() > deadline):
+                    return
+                timer.stop()
+                timer.deleteLater()
+                # Conexões que não responderam não entram em results
+                executor.shutdown(wait=False, cancel_futures=True)
+                # close() emite canceled(): desconecta antes para não marcar cancelamento
+                cast(Any, progress.canceled).disconnect(on_cancel)
+                progress.close()
+                
                 if test_cancelled[0]:
-                    break
-                thread = threading.Thread(target=test_connection, args=(i+1,))
-                threads.append(thread)
-                thread.start()
-                progress.setValue(10 + (i+1) * 10)
-                QApplication.processEvents()
+                    if self.toast_cb:
+                        self.toast_cb("❌ Teste cancelado")
+                    return
+                self._show_shared_test_report(db_path, num_connections, list(results), list(errors))
             
-            # Aguarda todas as threads terminarem
-            progress.setLabelText(
-                f"Testando modo compartilhado...\n\n"
-                f"Aguardando resposta das {num_connections} conexões..."
+            cast(Any, timer.timeout).connect(on_tick)
+            timer.start()
+                    
+        except Exception as e:
+            show_message(
+                self,
+                "Erro no Teste",
+                f"Erro ao testar modo compartilhado:\n\n{e}",
+                ("OK",)
             )
-            QApplication.processEvents()
-            
-            for i, thread in enumerate(threads):
-                if test_cancelled[0]:
-                    break
-                thread.join(timeout=5)
-                progress.setValue(60 + (i+1) * 8)
-                QApplication.processEvents()
-            
-            progress.close()
-            
-            if test_cancelled[0]:
-                if self.toast_cb:
-                    self.toast_cb("❌ Teste cancelado")
-                return
-            
+            if self.toast_cb:
+                self.toast_cb(f"❌ Erro no teste: {str(e)[:50]}")
+    
+    def _show_shared_test_report(self, db_path: str, num_connections: int, results: list, errors: list) -> None:
+        """Monta e exibe o relatório do teste de compartilhamento"""
+        try:
             # Monta relatório
             total_success = len(results)
             total_errors = len(errors)
@@ -5898,7 +6918,7 @@ End If
                         report_lines.append(f"   • Conexão {err['id']}: {err['error']}")
             
             # Verifica se está em rede
-            if db_path.startswith("\\\\"):
+            if db_path.startswith((_UNC_PREFIX, '//')):
                 report_lines.append(f"\n🌐 Localização: Rede (UNC)")
             elif len(db_path) > 1 and db_path[1] == ':' and self._is_network_drive(db_path[0]):
                 report_lines.append(f"\n🌐 Localização: Unidade de Rede Mapeada")
@@ -5971,32 +6991,19 @@ End If
             from core.config import get_database_path
             import zipfile
             import subprocess
-            import shutil
             
             # Passo 1: Verificar Git
-            try:
-                git_check = subprocess.run(
-                    ["git", "--version"],
-                    capture_output=True,
-                    text=True,
-                    timeout=5,
-                    creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
-                )
-                
-                if git_check.returncode != 0:
-                    progress.close()
-                    if self.toast_cb:
-                        self.toast_cb("✅ Backup realizado com sucesso")
-                    return
-            except FileNotFoundError:
+            if not _has_cmd("git"):
                 progress.close()
                 if self.toast_cb:
                     self.toast_cb("✅ Backup realizado com sucesso")
                 return
             
-            # Passo 2: Obter caminho do banco
+            # Passo 2: Obter caminho do banco (uma listagem do diretório responde
+            # pela existência do banco e do config.yaml)
             db_path = get_database_path()
-            if not os.path.isfile(db_path):
+            db_dir_files = _stat_db_dir(os.path.dirname(db_path))
+            if os.path.normcase(os.path.basename(db_path)) not in db_dir_files:
                 progress.close()
                 if self.toast_cb:
                     self.toast_cb("✅ Backup realizado com sucesso")
@@ -6009,21 +7016,22 @@ End If
             computer_name = os.environ.get('COMPUTERNAME', 'PC').replace(' ', '_')  # Nome do computador
             backup_file = os.path.join(BACKUP_DIR, f"{computer_name}_{db_name}_{timestamp}.zip")
             
-            with zipfile.ZipFile(backup_file, 'w', zipfile.ZIP_DEFLATED) as z:
-                # Adiciona o banco de dados principal
-                z.write(db_path, arcname=os.path.basename(db_path))
-                
-                # Adiciona arquivos WAL e SHM (se existirem)
-                wal_path = db_path + "-wal"
-                shm_path = db_path + "-shm"
-                if os.path.isfile(wal_path):
-                    z.write(wal_path, arcname=os.path.basename(wal_path))
-                if os.path.isfile(shm_path):
-                    z.write(shm_path, arcname=os.path.basename(shm_path))
+            with zipfile.ZipFile(backup_file, 'w', zipfile.ZIP_STORED) as z:
+                # Adiciona um snapshot consistente do banco (já inclui o WAL; é o
+                # único artefato enviado à nuvem). Só ele compensa comprimir:
+                # nível 3 é ~2x mais rápido que o padrão com tamanho quase igual.
+                snapshot_path = backup_file + ".db.tmp"
+                try:
+                    _sqlite_snapshot(db_path, snapshot_path)
+                    z.write(snapshot_path, arcname=os.path.basename(db_path),
+                            compress_type=zipfile.ZIP_DEFLATED, compresslevel=3)
+                finally:
+                    if os.path.exists(snapshot_path):
+                        os.remove(snapshot_path)
                 
                 # Adiciona config.yaml (se existir)
                 config_path = os.path.join(os.path.dirname(db_path), "config.yaml")
-                if os.path.isfile(config_path):
+                if os.path.normcase("config.yaml") in db_dir_files:
                     z.write(config_path, arcname="config.yaml")
             
             # Passo 4: Clone ou pull do repositório
@@ -6031,8 +7039,10 @@ End If
             
             try:
                 if not os.path.exists(backup_repo_dir):
+                    # Clone raso: só o último commit, sem o histórico de backups antigos
                     clone_result = subprocess.run(
-                        ["git", "clone", "git@github.com:W4lterBr/Backup_Clientes.git", backup_repo_dir],
+                        ["git", "clone", "--depth=1", "--filter=blob:none", "--no-tags",
+                         "git@github.com:W4lterBr/Backup_Clientes.git", backup_repo_dir],
                         capture_output=True,
                         text=True,
                         timeout=60,
@@ -6045,39 +7055,42 @@ End If
                             self.toast_cb("✅ Backup realizado com sucesso")
                         return
                 else:
-                    subprocess.run(
-                        ["git", "pull", "origin", "main"],
-                        cwd=backup_repo_dir,
-                        capture_output=True,
-                        text=True,
-                        timeout=30,
-                        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
-                    )
-                
-                # Passo 5: Copiar arquivos
-                timestamp_db = datetime.now().strftime("%d-%m-%Y")
-                db_backup_name = f"Confeitaria_Backup_{timestamp_db}.db"
-                db_dest_path = os.path.join(backup_repo_dir, db_backup_name)
-                
-                shutil.copy2(db_path, db_dest_path)
+                    _git_shallow_sync(backup_repo_dir)
                 
+                # Passo 5: Copiar o ZIP (o .db cru não vai para o git: o ZIP já o contém)
                 backup_filename = os.path.basename(backup_file)
                 zip_dest_path = os.path.join(backup_repo_dir, backup_filename)
-                shutil.copy2(backup_file, zip_dest_path)
-                
-                # Passo 6: Commit
-                subprocess.run(["git", "config", "user.name", "Confeitaria Manual Backup"], 
-                             cwd=backup_repo_dir, capture_output=True,
-                             creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0)
-                subprocess.run(["git", "config", "user.email", "backup@confeitaria.local"], 
-                             cwd=backup_repo_dir, capture_output=True,
-                             creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0)
-                subprocess.run(["git", "add", db_backup_name, backup_filename], 
+                _fast_copy(backup_file, zip_dest_path)
+                
+                # Janela deslizante: só os últimos cloud_backup_keep ZIPs deste
+                # computador/banco ficam na árvore (os antigos seguem no histórico),
+                # então clone/pull raso baixa um tamanho fixo em vez de crescer a cada backup
+                prefix = f"{computer_name}_{db_name}_"
+                own_backups = []
+                for name in os.listdir(backup_repo_dir):
+                    if name.startswith(prefix) and name.endswith(".zip"):
+                        try:
+                            stamp = datetime.strptime(name[len(prefix):-4], "%d-%m-%Y_%H-%M")
+                        except ValueError:
+                            continue
+                        own_backups.append((stamp, name))
+                own_backups.sort(reverse=True)
+                old_backups = [name for _, name in own_backups[self.cloud_backup_keep:] if name != backup_filename]
+                if old_backups:
+                    subprocess.run(["git", "rm", "-q", "--ignore-unmatch", "--", *old_backups],
+                                 cwd=backup_repo_dir, capture_output=True,
+                                 creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0)
+                
+                # Passo 6: Commit (identidade via -c: sem gravar no .git/config a cada backup)
+                subprocess.run(["git", "add", backup_filename], 
                              cwd=backup_repo_dir, capture_output=True,
                              creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0)
                 
                 commit_msg = f"Backup manual na nuvem - {datetime.now().strftime('%d/%m/%Y %H:%M')}"
-                commit_result = subprocess.run(["git", "commit", "-m", commit_msg], 
+                commit_result = subprocess.run(
+                             ["git", "-c", "user.name=Confeitaria Manual Backup",
+                              "-c", "user.email=backup@confeitaria.local",
+                              "commit", "-m", commit_msg, "--", backup_filename, *old_backups], 
                              cwd=backup_repo_dir, capture_output=True, text=True, timeout=10,
                              creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0)
                 
@@ -6109,7 +7122,6 @@ End If
             from core.config import get_database_path
             import zipfile
             import tempfile
-            import shutil
             from ui.dialogs.custom_filedialog import CustomFileDialog
             
             # Confirma ação (é uma operação perigosa)
@@ -6179,20 +7191,21 @@ End If
             
             try:
                 os.makedirs(BACKUP_DIR, exist_ok=True)
+                db_dir_files = _stat_db_dir(db_dir)
                 with zipfile.ZipFile(safety_backup_path, 'w', zipfile.ZIP_DEFLATED) as z:
-                    if os.path.isfile(current_db_path):
-                        z.write(current_db_path, arcname=os.path.basename(current_db_path))
-                    
-                    wal_path = current_db_path + "-wal"
-                    shm_path = current_db_path + "-shm"
-                    if os.path.isfile(wal_path):
-                        z.write(wal_path, arcname=os.path.basename(wal_path))
-                    if os.path.isfile(shm_path):
-                        z.write(shm_path, arcname=os.path.basename(shm_path))
+                    if os.path.normcase(os.path.basename(current_db_path)) in db_dir_files:
+                        # Snapshot consistente (já inclui o conteúdo do WAL)
+                        snapshot_path = safety_backup_path + ".db.tmp"
+                        try:
+                            _sqlite_snapshot(current_db_path, snapshot_path)
+                            z.write(snapshot_path, arcname=os.path.basename(current_db_path))
+                        finally:
+                            if os.path.exists(snapshot_path):
+                                os.remove(snapshot_path)
                     
                     # Inclui config.yaml se existir
                     config_path = os.path.join(db_dir, "config.yaml")
-                    if os.path.isfile(config_path):
+                    if os.path.normcase("config.yaml") in db_dir_files:
                         z.write(config_path, arcname="config.yaml")
                 
                 print(f"[Restore] 💾 Backup de segurança criado: {safety_backup_path}")
@@ -6207,14 +7220,39 @@ End If
             
             # Extrai o ZIP em diretório temporário e valida
             try:
-                with tempfile.TemporaryDirectory() as temp_dir:
+                # Extrai ao lado do banco (mesmo sistema de arquivos) para que a
+                # troca final seja um os.replace atômico, não uma cópia entre discos
+                with tempfile.TemporaryDirectory(dir=db_dir or None) as temp_dir, \
+                        zipfile.ZipFile(backup_zip, 'r') as z:
                     print(f"[Restore] 📦 Extraindo backup para verificação...")
                     
-                    with zipfile.ZipFile(backup_zip, 'r') as z:
-                        z.extractall(temp_dir)
+                    # Só nomes simples na raiz do ZIP: no Windows '..\\x.db' ou
+                    # 'C:x.db' passariam por um filtro de '/' e sairiam de temp_dir
+                    zip_members = {
+                        name for name in z.namelist()
+                        if name not in ('', '.', '..')
+                        and os.path.basename(name) == name
+                        and '/' not in name and '\\' not in name and ':' not in name
+                    }
+                    temp_root = os.path.realpath(temp_dir)
+                    
+                    def extract_member(name: str) -> Optional[str]:
+                        """Extrai um membro do ZIP para temp_dir (buffer de 1 MB); None se não existir"""
+                        if name not in zip_members:
+                            return None
+                        dest = os.path.realpath(os.path.join(temp_root, name))
+                        if os.path.dirname(dest) != temp_root:
+                            return None
+                        with z.open(name) as src, open(dest, 'wb') as dst:
+                            shutil.copyfileobj(src, dst, length=1 << 20)
+                            # Dados no disco antes do os.replace: sem isso, uma queda
+                            # de energia pode deixar o nome novo apontando para lixo
+                            dst.flush()
+                            os.fsync(dst.fileno())
+                        return dest
                     
                     # Verifica se tem arquivo .db
-                    db_files = [f for f in os.listdir(temp_dir) if f.endswith('.db')]
+                    db_files = sorted(name for name in zip_members if name.endswith(_DB_EXT))
                     if not db_files:
                         show_message(
                             self,
@@ -6224,16 +7262,22 @@ End If
                         )
                         return
                     
-                    # Usa o primeiro .db encontrado
+                    # Usa o primeiro .db encontrado. Só ele (e o WAL, que faz parte
+                    # do banco) é extraído antes da validação; o config vem depois.
+                    # O -shm do ZIP é ignorado: é só um índice do WAL e o SQLite o recria.
                     restore_db_name = db_files[0]
-                    restore_db_path = os.path.join(temp_dir, restore_db_name)
+                    restore_db_path = extract_member(restore_db_name)
+                    extract_member(restore_db_name + "-wal")
                     
                     # Valida integridade do banco
                     try:
                         import sqlite3
                         test_conn = sqlite3.connect(restore_db_path)
-                        test_conn.execute("PRAGMA integrity_check")
+                        check = "integrity_check" if self.full_integrity_check else "quick_check"
+                        row = test_conn.execute(f"PRAGMA {check}").fetchone()
                         test_conn.close()
+                        if not row or row[0] != "ok":
+                            raise sqlite3.DatabaseError(row[0] if row else "sem resposta")
                         print(f"[Restore] ✅ Integridade do banco validada")
                     except Exception as e:
                         show_message(
@@ -6244,42 +7288,31 @@ End If
                         )
                         return
                     
-                    # Remove arquivos antigos
-                    try:
-                        if os.path.isfile(current_db_path):
-                            os.remove(current_db_path)
-                        
-                        wal_path = current_db_path + "-wal"
-                        shm_path = current_db_path + "-shm"
-                        if os.path.isfile(wal_path):
-                            os.remove(wal_path)
-                        if os.path.isfile(shm_path):
-                            os.remove(shm_path)
-                    except Exception as e:
-                        print(f"[Restore] ⚠️ Erro ao remover arquivos antigos: {e}")
-                    
-                    # Copia novos arquivos
-                    shutil.copy2(restore_db_path, current_db_path)
-                    print(f"[Restore] ✅ Banco de dados restaurado: {restore_db_name}")
-                    
-                    # Restaura WAL e SHM se existirem
-                    wal_name = restore_db_name + "-wal"
-                    shm_name = restore_db_name + "-shm"
+                    # Fecha a conexão de status do diálogo (no Windows ela prende o arquivo)
+                    self._invalidate_path()
                     
-                    if os.path.isfile(os.path.join(temp_dir, wal_name)):
-                        shutil.copy2(os.path.join(temp_dir, wal_name), current_db_path + "-wal")
-                        print(f"[Restore] ✅ WAL restaurado")
-                    
-                    if os.path.isfile(os.path.join(temp_dir, shm_name)):
-                        shutil.copy2(os.path.join(temp_dir, shm_name), current_db_path + "-shm")
-                        print(f"[Restore] ✅ SHM restaurado")
+                    # Troca atômica dos arquivos; com o banco em uso pelo app,
+                    # grava o backup dentro do banco aberto (ver _swap_restored_db)
+                    if _swap_restored_db(restore_db_path, current_db_path):
+                        print(f"[Restore] ✅ Banco de dados restaurado: {restore_db_name}")
+                    else:
+                        print(f"[Restore] ✅ Banco de dados restaurado no arquivo em uso: {restore_db_name}")
                     
                     # Restaura config.yaml se existir
-                    config_in_zip = os.path.join(temp_dir, "config.yaml")
-                    if os.path.isfile(config_in_zip):
+                    config_in_zip = extract_member("config.yaml")
+                    if config_in_zip:
                         config_dest = os.path.join(db_dir, "config.yaml")
-                        shutil.copy2(config_in_zip, config_dest)
+                        os.replace(config_in_zip, config_dest)
                         print(f"[Restore] ✅ Configuração restaurada")
+                    
+                    # Um único fsync do diretório persiste todas as renomeações
+                    # (no Windows não se abre diretório; lá o MoveFileEx já basta)
+                    if sys.platform != 'win32':
+                        dir_fd = os.open(db_dir or ".", os.O_RDONLY)
+                        try:
+                            os.fsync(dir_fd)
+                        finally:
+                            os.close(dir_fd)
                 
                 # Sucesso
                 show_message(
@@ -6314,7 +7347,6 @@ End If
     def _select_cloud_backup(self) -> Optional[str]:
         """Lista backups disponíveis na nuvem e permite selecionar um para restaurar"""
         try:
-            import subprocess
             
             base_dir = os.path.dirname(os.path.abspath(__file__))
             backup_repo_dir = os.path.join(base_dir, "Backup_Clientes")
@@ -6355,25 +7387,19 @@ End If
                         return None
             
             # Lista todos os arquivos ZIP no repositório
-            backup_files = []
-            if os.path.exists(backup_repo_dir):
-                for filename in os.listdir(backup_repo_dir):
-                    if filename.endswith('.zip') and 'backup' in filename.lower():
-                        filepath = os.path.join(backup_repo_dir, filename)
-                        if os.path.isfile(filepath):
-                            # Obtém informações do arquivo
-                            size = os.path.getsize(filepath)
-                            size_mb = size / (1024 * 1024)
-                            mtime = os.path.getmtime(filepath)
-                            date_str = datetime.fromtimestamp(mtime).strftime("%d/%m/%Y %H:%M")
-                            
-                            backup_files.append({
-                                'filename': filename,
-                                'filepath': filepath,
-                                'size_mb': size_mb,
-                                'date': date_str,
-                                'mtime': mtime
-                            })
+            backup_files: list[tuple[float, int, str, str]] = []  # (mtime, tamanho, nome, caminho)
+            # (um scandir: nome e tipo vêm da listagem, um stat por ZIP no máximo)
+            try:
+                with os.scandir(backup_repo_dir) as it:
+                    for entry in it:
+                        filename = entry.name
+                        if not _BACKUP_RE.search(filename) or not entry.is_file():
+                            continue
+                        # Obtém informações do arquivo (formatadas só na exibição)
+                        st = entry.stat()
+                        backup_files.append((st.st_mtime, st.st_size, filename, entry.path))
+            except FileNotFoundError:
+                pass
             
             if not backup_files:
                 show_message(
@@ -6385,98 +7411,43 @@ End If
                 return None
             
             # Ordena por data (mais recente primeiro)
-            backup_files.sort(key=lambda x: x['mtime'], reverse=True)
+            # (tuplas comparadas em C, sem lambda por comparação)
+            backup_files.sort(reverse=True)
             
             # Cria diálogo de seleção
-            from PyQt6.QtWidgets import QDialog, QVBoxLayout, QListWidget, QDialogButtonBox, QLabel
-            from core.config import load_config
-            
             dialog = QDialog(self)
             dialog.setWindowTitle("☁️ Selecionar Backup da Nuvem")
             dialog.resize(600, 400)
             
-            # Aplica tema
-            theme_cfg = load_config().get("theme", "light")
-            if theme_cfg == "dark":
-                dialog.setStyleSheet("""
-                    QDialog { 
-                        background-color: #2b2b2b; 
-                        color: #ffffff; 
-                    }
-                    QLabel {
-                        color: #ffffff;
-                    }
-                """)
-            else:
-                dialog.setStyleSheet("""
-                    QDialog { 
-                        background-color: #ffffff; 
-                        color: #000000; 
-                    }
-                """)
+            # Aplica tema (folhas prontas no nível do módulo)
+            theme_cfg = self._current_theme()
+            dialog.setStyleSheet(_CLOUD_BACKUP_QSS.get(theme_cfg, _LIGHT_QSS))
             
             layout = QVBoxLayout(dialog)
             
             label = QLabel(f"📦 {len(backup_files)} backup(s) disponível(is) na nuvem:")
-            label.setStyleSheet("font-weight: bold; font-size: 12px; margin-bottom: 10px;")
+            label.setObjectName("CloudBackupTitle")
             layout.addWidget(label)
             
             list_widget = QListWidget()
-            
-            # Estilo baseado no tema
-            if theme_cfg == "dark":
-                list_widget.setStyleSheet("""
-                    QListWidget {
-                        font-family: 'Consolas', 'Courier New', monospace;
-                        font-size: 11px;
-                        background-color: #1e1e1e;
-                        color: #ffffff;
-                        border: 1px solid #3f3f3f;
-                    }
-                    QListWidget::item {
-                        padding: 8px;
-                        border-bottom: 1px solid #3f3f3f;
-                    }
-                    QListWidget::item:hover {
-                        background-color: #2d2d2d;
-                    }
-                    QListWidget::item:selected {
-                        background-color: #0078d4;
-                        color: white;
-                    }
-                """)
-                info_color = "#999"
-            else:
-                list_widget.setStyleSheet("""
-                    QListWidget {
-                        font-family: 'Consolas', 'Courier New', monospace;
-                        font-size: 11px;
-                        background-color: #ffffff;
-                        color: #000000;
-                        border: 1px solid #e0e0e0;
-                    }
-                    QListWidget::item {
-                        padding: 8px;
-                        border-bottom: 1px solid #e0e0e0;
-                    }
-                    QListWidget::item:hover {
-                        background-color: #f0f0f0;
-                    }
-                    QListWidget::item:selected {
-                        background-color: #0078d4;
-                        color: white;
-                    }
-                """)
-                info_color = "#666"
-            
-            for backup in backup_files:
-                item_text = f"📅 {backup['date']}  |  📦 {backup['size_mb']:.2f} MB  |  📄 {backup['filename']}"
-                list_widget.addItem(item_text)
+            list_widget.setObjectName("CloudBackupList")
+            # Todas as linhas têm a mesma altura: a view não mede item por item
+            list_widget.setUniformItemSizes(True)
+            
+            # Uma única chamada addItems (uma conversão para QStringList) em vez de addItem por linha,
+            # com o repaint suspenso durante a inserção
+            list_widget.setUpdatesEnabled(False)
+            list_widget.addItems([
+                f"📅 {datetime.fromtimestamp(mtime).strftime('%d/%m/%Y %H:%M')}  |  "
+                f"📦 {size / (1024 * 1024):.2f} MB  |  📄 {filename}"
+                for mtime, size, filename, _ in backup_files
+            ])
+            list_widget.setUpdatesEnabled(True)
             
             layout.addWidget(list_widget)
             
             info_label = QLabel("💡 Dica: Selecione um backup e clique em 'Restaurar'")
-            info_label.setStyleSheet(f"color: {info_color}; font-size: 10px; margin-top: 5px;")
+            info_label.setObjectName("CloudBackupInfo")
             layout.addWidget(info_label)
             
             buttons = QDialogButtonBox(
@@ -6491,7 +7462,7 @@ End If
             if dialog.exec() == QDialog.DialogCode.Accepted:
                 selected_index = list_widget.currentRow()
                 if selected_index >= 0:
-                    return backup_files[selected_index]['filepath']
+                    return backup_files[selected_index][3]
             
             return None
             
@@ -6507,45 +7478,19 @@ End If
     def _install_git_automatically(self) -> bool:
         """Instala o Git automaticamente usando winget (gerenciador nativo do Windows)"""
         try:
-            import subprocess
-            import threading
             
             # Verifica se o winget está disponível (Windows 10 1809+ / Windows 11)
-            try:
-                check_winget = subprocess.run(
-                    ["winget", "--version"],
-                    capture_output=True,
-                    timeout=5,
-                    creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
-                )
-                
-                if check_winget.returncode != 0:
-                    # winget não disponível - usar método manual
-                    show_message(
-                        self,
-                        "⚠️ Instalação Manual Necessária",
-                        "O Git não está instalado neste sistema.\n\n"
-                        "📋 Para instalar:\n"
-                        "1. Abra o Microsoft Store\n"
-                        "2. Procure por 'Git'\n"
-                        "3. Instale o 'Git for Windows'\n\n"
-                        "Ou acesse: https://git-scm.com/download/win\n\n"
-                        "Após instalar, reinicie o computador.",
-                        ("OK",)
-                    )
-                    return False
-                    
-            except FileNotFoundError:
-                # winget não está instalado (Windows muito antigo)
+            if not _has_cmd("winget"):
                 show_message(
                     self,
-                    "⚠️ Sistema Desatualizado",
-                    "Seu Windows precisa ser atualizado para instalar automaticamente.\n\n"
-                    "📋 Instalação manual:\n"
+                    "⚠️ Instalação Manual Necessária",
+                    "Não foi possível instalar o Git automaticamente (winget indisponível).\n\n"
+                    "📋 Para instalar:\n"
                     "1. Acesse: https://git-scm.com/download/win\n"
+                    "   (ou procure 'Git for Windows' na Microsoft Store)\n"
                     "2. Baixe e execute o instalador\n"
                     "3. Reinicie o computador\n\n"
-                    "Alternativamente, atualize o Windows para a versão mais recente.",
+                    "Se o winget não existir, atualize o Windows para a versão mais recente.",
                     ("OK",)
                 )
                 return False
@@ -6567,11 +7512,9 @@ End If
             progress.show()
             QApplication.processEvents()
             
-            # Flags de controle
-            cancelled = [False]
-            completed = [False]
-            error_msg = [None]
-            success = [False]
+            # Estado compartilhado com a thread de instalação
+            state = SimpleNamespace(cancelled=False, completed=False, error_msg=None, success=False)
+            done = threading.Event()  # sinalizado pela thread ao terminar
             
             def install_thread():
                 try:
@@ -6585,39 +7528,42 @@ End If
                         creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
                     )
                     
-                    if cancelled[0]:
+                    if state.cancelled:
                         return
                     
                     if result.returncode == 0 or "successfully installed" in result.stdout.lower():
-                        success[0] = True
-                        completed[0] = True
+                        state.success = True
+                        state.completed = True
                     else:
-                        error_msg[0] = result.stderr if result.stderr else result.stdout
-                        completed[0] = True
+                        state.error_msg = result.stderr if result.stderr else result.stdout
+                        state.completed = True
                         
                 except subprocess.TimeoutExpired:
-                    if not cancelled[0]:
-                        error_msg[0] = "Timeout: Instalação demorou mais de 5 minutos"
-                    completed[0] = True
+                    if not state.cancelled:
+                        state.error_msg = "Timeout: Instalação demorou mais de 5 minutos"
+                    state.completed = True
                 except Exception as e:
-                    if not cancelled[0]:
-                        error_msg[0] = str(e)
-                    completed[0] = True
+                    if not state.cancelled:
+                        state.error_msg = str(e)
+                    state.completed = True
+                finally:
+                    done.set()
             
             # Inicia thread de instalação
             thread = threading.Thread(target=install_thread, daemon=True)
             thread.start()
             
-            # Atualiza progresso enquanto instala
-            progress_value = 10
-            while thread.is_alive() and not completed[0]:
+            # Atualiza progresso enquanto instala; done.wait acorda assim que a
+            # thread termina, sem esperar o fim de um intervalo fixo
+            started = time.monotonic()
+            while not done.wait(0.1):
                 if progress.wasCanceled():
-                    cancelled[0] = True
+                    state.cancelled = True
                     progress.setLabelText("Cancelando instalação...\n\nAguarde...")
                     break
                 
-                # Anima progresso (10% a 90%)
-                progress_value = min(progress_value + 2, 90)
+                # Anima progresso (10% a 90%, +2% a cada 0,5 s)
+                progress_value = min(10 + int((time.monotonic() - started) / 0.5) * 2, 90)
                 progress.setValue(progress_value)
                 
                 if progress_value < 40:
@@ -6643,7 +7589,6 @@ End If
                     )
                 
                 QApplication.processEvents()
-                threading.Event().wait(0.5)  # Aguarda 0.5s entre atualizações
             
             # Aguarda thread finalizar
             thread.join(timeout=2)
@@ -6652,24 +7597,26 @@ End If
             progress.close()
             
             # Verifica resultado
-            if cancelled[0]:
+            if state.cancelled:
                 if self.toast_cb:
                     self.toast_cb("❌ Instalação cancelada")
                 return False
             
-            if error_msg[0]:
+            if state.error_msg:
                 show_message(
                     self,
                     "⚠️ Erro na Instalação",
                     f"O winget não conseguiu instalar o Git.\n\n"
-                    f"Detalhes: {error_msg[0][:200]}\n\n"
+                    f"Detalhes: {state.error_msg[:200]}\n\n"
                     "Tente instalar manualmente:\n"
                     "https://git-scm.com/download/win",
                     ("OK",)
                 )
                 return False
             
-            if success[0]:
+            if state.success:
+                # Próxima sondagem precisa enxergar o git recém-instalado
+                _has_cmd.cache_clear()
                 return True
             
             return False
@@ -6688,30 +7635,9 @@ End If
     def _clone_repository_with_progress(self, repo_dir: str) -> bool:
         """Clona repositório com barra de progresso e opção de cancelamento"""
         try:
-            import subprocess
-            import threading
             
             # Verifica se o Git está instalado
-            try:
-                git_check = subprocess.run(
-                    ["git", "--version"],
-                    capture_output=True,
-                    timeout=5,
-                    creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
-                )
-                if git_check.returncode != 0:
-                    show_message(
-                        self,
-                        "❌ Git Não Instalado",
-                        "O Git não está instalado neste sistema.\n\n"
-                        "Para usar backup da nuvem, você precisa:\n"
-                        "1. Instalar o Git: https://git-scm.com/download/win\n"
-                        "2. Configurar chave SSH no GitHub\n\n"
-                        "Alternativamente, use apenas backup local.",
-                        ("OK",)
-                    )
-                    return False
-            except FileNotFoundError:
+            if not _has_cmd("git"):
                 # Git não encontrado - oferecer instalação automática
                 response = show_message(
                     self,
@@ -6750,15 +7676,6 @@ End If
                             ("OK",)
                         )
                 return False
-            except Exception as e:
-                show_message(
-                    self,
-                    "❌ Erro ao Verificar Git",
-                    f"Não foi possível verificar se o Git está instalado:\n\n{e}\n\n"
-                    "Certifique-se de que o Git está instalado e acessível.",
-                    ("OK",)
-                )
-                return False
             
             # Cria diálogo de progresso com cancelamento
             progress = QProgressDialog(
@@ -6775,113 +7692,117 @@ End If
             progress.show()
             QApplication.processEvents()
             
-            # Flags de controle
-            cancelled = [False]
-            completed = [False]
-            error_msg = [None]
-            process = [None]
-            update_counter = [0]  # Contador para reduzir chamadas processEvents
+            # Estado compartilhado com a thread do clone
+            state = SimpleNamespace(cancelled=False, completed=False, error_msg=None, process=None, stopper=None)
+            # (percentual, fase) lidos do stderr do git, consumidos pelo loop da UI
+            progress_queue: queue.Queue = queue.Queue()
             
             def clone_thread():
                 try:
-                    # Executa git clone
-                    proc = subprocess.Popen(
-                        ["git", "clone", "--progress", "git@github.com:W4lterBr/Backup_Clientes.git", repo_dir],
-                        stdout=subprocess.PIPE,
+                    # Executa git clone; o progresso real ("Receiving objects:  42% ...")
+                    # sai no stderr, com \r entre atualizações (texto traduz para \n).
+                    # Clone raso da main: só a árvore atual, sem o histórico de ZIPs antigos
+                    proc = _popen_group(
+                        ["git", "clone", "--progress", "--depth=1", "--filter=blob:none",
+                         "--single-branch", "--branch=main", "--no-tags",
+                         "git@github.com:W4lterBr/Backup_Clientes.git", repo_dir],
+                        stdout=subprocess.DEVNULL,
                         stderr=subprocess.PIPE,
                         text=True,
-                        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+                        bufsize=1
                     )
-                    process[0] = proc
-                    
-                    # Monitora progresso
-                    while proc.poll() is None:
-                        if cancelled[0]:
-                            proc.terminate()
-                            try:
-                                proc.wait(timeout=2)
-                            except subprocess.TimeoutExpired:
-                                proc.kill()
-                            return
-                        
-                        # Incrementa contador para atualização visual
-                        update_counter[0] = (update_counter[0] + 1) % 35
-                        threading.Event().wait(0.1)
+                    state.process = proc
+                    if state.cancelled:
+                        # Cancelado antes do Popen retornar: a UI não viu o processo
+                        state.stopper = _stop_process_group(proc)
                     
-                    # Verifica resultado
-                    stdout, stderr = proc.communicate()
+                    # Lê o progresso até o git fechar o stderr (fim ou cancelamento)
+                    stderr_tail: list[str] = []
+                    for line in cast(Any, proc.stderr):
+                        line = line.strip()
+                        if not line:
+                            continue
+                        stderr_tail = (stderr_tail + [line])[-20:]
+                        match = _GIT_PROGRESS_RE.search(line)
+                        if match:
+                            progress_queue.put((int(match.group(2)), match.group(1)))
+                    proc.wait()
                     
-                    if proc.returncode != 0 and not cancelled[0]:
-                        error_msg[0] = f"Erro ao clonar:\n{stderr}"
+                    if proc.returncode != 0 and not state.cancelled:
+                        state.error_msg = "Erro ao clonar:\n" + "\n".join(stderr_tail)
                     else:
-                        completed[0] = True
+                        state.completed = True
                         
-                except subprocess.TimeoutExpired:
-                    error_msg[0] = "Timeout: Download demorou muito (>120s)"
                 except Exception as e:
-                    error_msg[0] = f"Erro inesperado: {e}"
+                    state.error_msg = f"Erro inesperado: {e}"
             
             # Inicia thread
             thread = threading.Thread(target=clone_thread, daemon=True)
             thread.start()
             
-            # Aguarda conclusão com menos chamadas processEvents
-            last_update = 0
+            # Aguarda conclusão atualizando a barra com o progresso real do git
             while thread.is_alive():
-                # Atualiza UI apenas quando o contador mudar (reduz sobrecarga)
-                current_count = update_counter[0]
-                if current_count != last_update:
-                    progress_value = 20 + (current_count * 2)  # 20 a 90%
-                    progress.setValue(min(progress_value, 90))
-                    progress.setLabelText("Baixando backups da nuvem...\n\n📦 Clonando repositório...")
-                    last_update = current_count
+                latest = None
+                try:
+                    while True:
+                        latest = progress_queue.get_nowait()
+                except queue.Empty:
+                    pass
+                if latest is not None:
+                    percent, phase = latest
+                    progress.setValue(_git_progress_value(phase, percent))
+                    progress.setLabelText(f"Baixando backups da nuvem...\n\n📦 {phase}: {percent}%")
                 
                 QApplication.processEvents()
-                threading.Event().wait(0.2)  # Aumentado de 0.1 para 0.2
+                thread.join(0.05)
                 
                 # Verifica cancelamento
                 if progress.wasCanceled():
-                    cancelled[0] = True
+                    state.cancelled = True
                     progress.setLabelText("Cancelando download...\n\nAguarde...")
                     
-                    # Termina processo se existir
-                    if process[0]:
-                        try:
-                            process[0].terminate()
-                            process[0].wait(timeout=2)
-                        except Exception:
-                            try:
-                                process[0].kill()
-                            except Exception:
-                                pass
+                    # Termina o git e seus filhos (ssh) se existir
+                    if state.process:
+                        state.stopper = _stop_process_group(state.process)
                     break
             
             thread.join(timeout=2)
+            
+            # Antes de apagar o clone parcial, espera o encerramento do git/ssh
+            # (taskkill pode levar alguns segundos): com handles abertos nos
+            # arquivos de pack, o rmtree falharia no Windows
+            if state.cancelled:
+                deadline = time.monotonic() + 12
+                while time.monotonic() < deadline:
+                    stopper = state.stopper
+                    if stopper is not None:
+                        stopper.join(0.05)
+                        if not stopper.is_alive() and not thread.is_alive():
+                            break
+                    elif not thread.is_alive():
+                        break
+                    else:
+                        thread.join(0.05)
+                    QApplication.processEvents()
             progress.close()
             
             # Verifica resultado
-            if cancelled[0]:
-                # Remove diretório parcial
-                if os.path.exists(repo_dir):
-                    try:
-                        import shutil
-                        shutil.rmtree(repo_dir)
-                    except Exception:
-                        pass
+            if state.cancelled:
+                # Remove diretório parcial (senão o próximo acesso o trata como clone válido)
+                try:
+                    _rmtree_force(repo_dir)
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    print(f"[Restore] ⚠️ Não foi possível remover clone parcial: {e}")
                 
                 if self.toast_cb:
                     self.toast_cb("❌ Download cancelado")
                 return False
             
-            if error_msg[0]:
+            if state.error_msg:
                 # Verifica se o erro é relacionado a SSH
-                error_text = error_msg[0].lower()
-                is_ssh_error = (
-                    "host key verification failed" in error_text or
-                    "could not read from remote repository" in error_text or
-                    "permission denied" in error_text or
-                    "publickey" in error_text
-                )
+                is_ssh_error = bool(_SSH_ERR_RE.search(state.error_msg))
                 
                 if is_ssh_error:
                     # Erro de SSH - mostrar mensagem com instruções
@@ -6889,7 +7810,7 @@ End If
                         self,
                         "🔐 Erro de Autenticação SSH",
                         "Não foi possível acessar o GitHub.\n\n"
-                        f"Erro: {error_msg[0][:100]}...\n\n"
+                        f"Erro: {state.error_msg[:100]}...\n\n"
                         "Isso acontece porque você não tem uma chave SSH configurada.\n\n"
                         "Para configurar:\n"
                         "1. Abra um terminal\n"
@@ -6904,7 +7825,7 @@ End If
                     show_message(
                         self,
                         "❌ Erro no Download",
-                        f"Não foi possível baixar os backups da nuvem:\n\n{error_msg[0]}\n\n"
+                        f"Não foi possível baixar os backups da nuvem:\n\n{state.error_msg}\n\n"
                         "Verifique:\n"
                         "• Conexão com a internet\n"
                         "• Acesso ao GitHub\n"
@@ -6913,7 +7834,7 @@ End If
                     )
                 return False
             
-            if completed[0]:
+            if state.completed:
                 if self.toast_cb:
                     self.toast_cb("✅ Backups baixados com sucesso")
                 return True
@@ -6932,20 +7853,9 @@ End If
     def _pull_repository_with_progress(self, repo_dir: str) -> bool:
         """Atualiza repositório com barra de progresso e opção de cancelamento"""
         try:
-            import subprocess
-            import threading
             
             # Verifica se o Git está instalado
-            try:
-                git_check = subprocess.run(
-                    ["git", "--version"],
-                    capture_output=True,
-                    timeout=5,
-                    creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
-                )
-                if git_check.returncode != 0:
-                    return False
-            except (FileNotFoundError, Exception):
+            if not _has_cmd("git"):
                 return False
             
             # Cria diálogo de progresso
@@ -6961,109 +7871,49 @@ End If
             progress.setMinimumDuration(0)
             progress.setValue(10)
             progress.show()
-            QApplication.processEvents()
             
-            # Flags de controle
-            cancelled = [False]
-            completed = [False]
-            error_msg = [None]
-            process = [None]
-            update_counter = [0]  # Contador para reduzir chamadas processEvents
+            # O git roda num QThread; progresso e resultado chegam por sinais
+            # (conexões enfileiradas) e um loop de eventos local espera o fim
+            state = SimpleNamespace(cancelled=False, completed=False, error_msg="")
+            worker = GitFetchWorker(repo_dir)
+            self._git_fetch_worker = worker  # mantém a thread viva até terminar
+            loop = QEventLoop()
             
-            def pull_thread():
-                try:
-                    # Executa git pull
-                    proc = subprocess.Popen(
-                        ["git", "-C", repo_dir, "pull", "--progress"],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        text=True,
-                        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
-                    )
-                    process[0] = proc
-                    
-                    # Monitora com timeout
-                    timeout_counter = 0
-                    while proc.poll() is None:
-                        if cancelled[0]:
-                            proc.terminate()
-                            try:
-                                proc.wait(timeout=2)
-                            except subprocess.TimeoutExpired:
-                                proc.kill()
-                            return
-                        
-                        # Timeout de 30 segundos
-                        timeout_counter += 1
-                        if timeout_counter > 300:  # 30s (0.1s * 300)
-                            proc.terminate()
-                            error_msg[0] = "Timeout: Atualização demorou muito (>30s)"
-                            return
-                        
-                        # Incrementa contador para atualização visual
-                        update_counter[0] = (update_counter[0] + 1) % 10
-                        threading.Event().wait(0.1)
-                    
-                    # Verifica resultado
-                    stdout, stderr = proc.communicate()
-                    
-                    if proc.returncode != 0 and not cancelled[0]:
-                        # Verifica se é "Already up to date"
-                        if "Already up to date" in stdout or "Already up-to-date" in stdout:
-                            completed[0] = True
-                        else:
-                            error_msg[0] = f"Erro ao atualizar:\n{stderr}"
-                    else:
-                        completed[0] = True
-                        
-                except Exception as e:
-                    error_msg[0] = f"Erro inesperado: {e}"
+            def on_progress(value: int, phase: str):
+                progress.setValue(value)
+                progress.setLabelText(f"Atualizando backups da nuvem...\n\n📥 {phase}")
             
-            # Inicia thread
-            thread = threading.Thread(target=pull_thread, daemon=True)
-            thread.start()
+            def on_result(ok: bool, message: str):
+                state.completed = ok
+                state.error_msg = message
+                loop.quit()
             
-            # Aguarda conclusão com menos chamadas processEvents
-            last_update = 0
-            while thread.is_alive():
-                # Atualiza UI apenas a cada 10 iterações (reduz sobrecarga)
-                current_count = update_counter[0]
-                if current_count != last_update:
-                    progress_value = 30 + (current_count * 6)  # 30 a 90%
-                    progress.setValue(min(progress_value, 90))
-                    progress.setLabelText("Atualizando backups da nuvem...\n\n📥 Baixando atualizações...")
-                    last_update = current_count
-                
-                QApplication.processEvents()
-                threading.Event().wait(0.2)  # Aumentado de 0.1 para 0.2
-                
-                if progress.wasCanceled():
-                    cancelled[0] = True
-                    if process[0]:
-                        try:
-                            process[0].terminate()
-                        except Exception:
-                            pass
-                    break
+            def on_cancel():
+                state.cancelled = True
+                worker.cancel()
+                loop.quit()
             
-            thread.join(timeout=2)
+            cast(Any, worker.progress).connect(on_progress)
+            cast(Any, worker.result).connect(on_result)
+            cast(Any, progress.canceled).connect(on_cancel)
+            progress.setLabelText("Atualizando backups da nuvem...\n\n📥 Baixando atualizações...")
+            worker.start()
+            loop.exec()
+            
+            worker.wait(2000)
+            # close() emite canceled(): desconecta antes para não marcar cancelamento
+            cast(Any, progress.canceled).disconnect(on_cancel)
             progress.close()
             
             # Verifica resultado
-            if cancelled[0]:
+            if state.cancelled:
                 if self.toast_cb:
                     self.toast_cb("❌ Atualização cancelada")
                 return False
             
-            if error_msg[0]:
+            if state.error_msg:
                 # Verifica se é erro de SSH
-                error_text = error_msg[0].lower()
-                is_ssh_error = (
-                    "host key verification failed" in error_text or
-                    "could not read from remote repository" in error_text or
-                    "permission denied" in error_text or
-                    "publickey" in error_text
-                )
+                is_ssh_error = bool(_SSH_ERR_RE.search(state.error_msg))
                 
                 if is_ssh_error:
                     # Retorna False e armazena flag para tratamento no método principal
@@ -7072,7 +7922,7 @@ End If
                 # Outros erros: retorna False silenciosamente
                 return False
             
-            if completed[0]:
+            if state.completed:
                 if self.toast_cb:
                     self.toast_cb("✅ Backups atualizados")
                 return True
@@ -7081,7 +7931,7 @@ End If
             
         except Exception:
             return False
-    
+
     def configure_auto_backup(self) -> None:
         """Configura automação de backup (hora em hora)"""
         try:
@@ -7106,77 +7956,26 @@ End If
             dialog.setWindowTitle("⚙️ Automação de Backup")
             dialog.resize(500, 400)
             
-            # Aplica tema
-            if is_dark:
-                dialog.setStyleSheet("""
-                    QDialog { 
-                        background-color: #2b2b2b; 
-                        color: #ffffff; 
-                    }
-                    QLabel { 
-                        color: #ffffff; 
-                    }
-                    QCheckBox { 
-                        color: #ffffff;
-                    }
-                    QRadioButton { 
-                        color: #ffffff;
-                        spacing: 5px;
-                    }
-                    QRadioButton::indicator {
-                        width: 16px;
-                        height: 16px;
-                    }
-                """)
-            else:
-                dialog.setStyleSheet("""
-                    QDialog { 
-                        background-color: #ffffff; 
-                        color: #000000; 
-                    }
-                    QLabel { 
-                        color: #000000; 
-                    }
-                    QCheckBox { 
-                        color: #000000;
-                    }
-                    QRadioButton { 
-                        color: #000000;
-                        spacing: 5px;
-                    }
-                    QRadioButton::indicator {
-                        width: 16px;
-                        height: 16px;
-                        border: 2px solid #999999;
-                        border-radius: 8px;
-                        background-color: #ffffff;
-                    }
-                    QRadioButton::indicator:checked {
-                        background-color: #0078d4;
-                        border: 2px solid #0078d4;
-                    }
-                    QRadioButton::indicator:hover {
-                        border: 2px solid #0078d4;
-                    }
-                """)
+            # Aplica tema (folhas prontas em _AUTO_BACKUP_QSS)
+            dialog.setStyleSheet(_AUTO_BACKUP_QSS["dark" if is_dark else "light"])
             
             layout = QVBoxLayout(dialog)
             layout.setSpacing(20)
             
             # Título
             title = QLabel("<b>Configuração de Backup Automático</b>")
-            title.setStyleSheet("font-size: 16px; margin-bottom: 10px;")
+            title.setObjectName("AutoBackupTitle")
             layout.addWidget(title)
             
             # Checkbox habilitar/desabilitar
             enable_check = QCheckBox("✅ Habilitar backup automático")
             enable_check.setChecked(current_enabled)
-            enable_check.setStyleSheet("font-size: 13px; margin-bottom: 10px;")
+            enable_check.setObjectName("AutoBackupEnable")
             layout.addWidget(enable_check)
             
             # Intervalo
             interval_label = QLabel("⏰ Intervalo entre backups:")
-            interval_label.setStyleSheet("font-size: 13px; margin-top: 10px;")
+            interval_label.setObjectName("AutoBackupIntervalLabel")
             layout.addWidget(interval_label)
             
             interval_layout = QHBoxLayout()
@@ -7185,27 +7984,27 @@ End If
             interval_spin.setMaximum(24)
             interval_spin.setValue(current_interval)
             interval_spin.setSuffix(" hora(s)")
-            interval_spin.setStyleSheet("font-size: 13px; padding: 5px;")
+            interval_spin.setObjectName("AutoBackupInterval")
             interval_layout.addWidget(interval_spin)
             interval_layout.addStretch()
             layout.addLayout(interval_layout)
             
             # Tipo de backup
             type_label = QLabel("📦 Tipo de backup:")
-            type_label.setStyleSheet("font-size: 13px; margin-top: 15px;")
+            type_label.setObjectName("AutoBackupTypeLabel")
             layout.addWidget(type_label)
             
             # Checkboxes para permitir múltipla seleção
             local_check = QCheckBox("💾 Local (mais rápido)")
-            local_check.setStyleSheet("font-size: 13px; margin-left: 10px;")
+            local_check.setObjectName("AutoBackupOption")
             layout.addWidget(local_check)
             
             cloud_check = QCheckBox("☁️ Nuvem (mais seguro)")
-            cloud_check.setStyleSheet("font-size: 13px; margin-left: 10px;")
+            cloud_check.setObjectName("AutoBackupOption")
             layout.addWidget(cloud_check)
             
             both_check = QCheckBox("🔒 Ambos (máxima segurança - recomendado)")
-            both_check.setStyleSheet("font-size: 13px; margin-left: 10px; font-weight: bold;")
+            both_check.setObjectName("AutoBackupOptionBoth")
             layout.addWidget(both_check)
             
             # Define seleção atual
@@ -7216,39 +8015,16 @@ End If
             else:
                 local_check.setChecked(True)
             
-            # Lógica de exclusão mútua para os checkboxes
-            def on_local_changed():
-                if local_check.isChecked():
-                    cloud_check.setChecked(False)
-                    both_check.setChecked(False)
-            
-            def on_cloud_changed():
-                if cloud_check.isChecked():
-                    local_check.setChecked(False)
-                    both_check.setChecked(False)
-            
-            def on_both_changed():
-                if both_check.isChecked():
-                    local_check.setChecked(False)
-                    cloud_check.setChecked(False)
-            
-            cast(Any, local_check.stateChanged).connect(on_local_changed)
-            cast(Any, cloud_check.stateChanged).connect(on_cloud_changed)
-            cast(Any, both_check.stateChanged).connect(on_both_changed)
+            # Exclusão mútua feita pelo próprio Qt (um único tipo marcado)
+            type_group = QButtonGroup(dialog)
+            type_group.setExclusive(True)
+            for check in (local_check, cloud_check, both_check):
+                type_group.addButton(check)
             
             # Informações
-            info_text = QLabel(
-                "ℹ️ <b>Informações:</b><br>"
-                "• O backup será executado automaticamente a cada intervalo<br>"
-                "• <b>Local:</b> Salvo na pasta 'backups' (rápido, sem internet)<br>"
-                "• <b>Nuvem:</b> Enviado para GitHub (seguro, requer conexão)<br>"
-                "• <b>Ambos:</b> Salva localmente E envia para nuvem (recomendado) 🔒<br>"
-                "• Você receberá notificações quando o backup for feito<br>"
-                "• O backup automático começa ao iniciar o sistema"
-            )
+            info_text = QLabel(_AUTO_BACKUP_INFO_HTML)
+            info_text.setObjectName("AutoBackupInfo")
             info_text.setWordWrap(True)
-            info_bg = "rgba(100, 100, 255, 0.1)" if not is_dark else "rgba(100, 100, 255, 0.15)"
-            info_text.setStyleSheet(f"padding: 15px; background: {info_bg}; border-radius: 8px; font-size: 12px; margin-top: 15px;")
             layout.addWidget(info_text)
             
             layout.addStretch()
@@ -7330,7 +8106,20 @@ End If
             )
     
     def _is_network_drive(self, drive_letter: str) -> bool:
-        """Verifica se uma letra de unidade é uma unidade de rede mapeada"""
+        """Verifica se uma letra de unidade é uma unidade de rede mapeada
+        
+        O resultado fica em cache por letra (o mapeamento raramente muda);
+        _invalidate_path limpa o cache quando o usuário troca de banco.
+        """
+        letter = drive_letter.upper()
+        cached = DatabaseDialog._network_drive_cache.get(letter)
+        if cached is not None:
+            return cached
+        # GetDriveTypeW responde em microssegundos; "net use" fica como alternativa
+        remote = _drive_is_remote(letter)
+        if remote is not None:
+            DatabaseDialog._network_drive_cache[letter] = remote
+            return remote
         try:
             import subprocess
             result = subprocess.run(
@@ -7339,9 +8128,11 @@ End If
                 text=True,
                 timeout=5
             )
-            return f"{drive_letter.upper()}:" in result.stdout
+            is_network = f"{letter}:" in result.stdout
         except Exception:
             return False
+        DatabaseDialog._network_drive_cache[letter] = is_network
+        return is_network
 
 
 class CustomersPage(BasePage):
@@ -9049,11 +9840,10 @@ class ReportsPage(BasePage):
     def refresh(self) -> None:
         today = date.today()
         ym = today.strftime("%Y-%m")
-        sales = self.db.query("SELECT SUM(total) AS s FROM orders WHERE substr(created_at,1,7)=?", (ym,))
-        sales_val = sales[0]["s"] or 0
-        self.lbl_sales_month.setText(f"Vendas (mês atual): {money(float(sales_val))}")
-        orders_count = self.db.query("SELECT COUNT(*) AS c FROM orders WHERE substr(created_at,1,7)=?", (ym,))
-        self.lbl_orders_month.setText(f"Pedidos (mês atual): {orders_count[0]['c']}")
+        # Faturamento e quantidade de pedidos do mês numa única consulta
+        month = self.db.query("SELECT COALESCE(SUM(total),0) AS s, COUNT(*) AS c FROM orders WHERE substr(created_at,1,7)=?", (ym,))
+        self.lbl_sales_month.setText(f"Vendas (mês atual): {money(float(month[0]['s']))}")
+        self.lbl_orders_month.setText(f"Pedidos (mês atual): {month[0]['c']}")
         tops = self.db.query("""
             SELECT p.name, SUM(o.quantity) AS q
             FROM orders o JOIN products p ON p.id=o.product_id
@@ -9464,6 +10254,7 @@ class SettingsPage(BasePage):
             cfg = load_config()
             cfg['theme'] = 'dark' if theme == 'dark' else 'light'
             save_config(cfg)
+            self.parent_window.current_theme = cfg['theme']  # type: ignore[attr-defined]
             
             if self.toast_cb:
                 self.toast_cb(f"Tema {'escuro' if theme=='dark' else 'claro'} aplicado e salvo.")
@@ -9701,6 +10492,9 @@ class SettingsPage(BasePage):
 # -----------------------------
 class MainWindow(QMainWindow):
     user: Any
+    # Tema ativo ("dark"/"light"); definido em main() e por SettingsPage.set_theme,
+    # lido pelos diálogos em vez de reler o config.yaml
+    current_theme: Optional[str] = None
 
     def animate_page_change(self, index: int) -> None:
         old_index = self.pages.currentIndex()
@@ -9760,7 +10554,7 @@ class MainWindow(QMainWindow):
         current_db_path = get_database_path()
         
         # LOG IMPORTANTE: Mostrar qual banco está sendo usado
-        if current_db_path.startswith('\\\\'):
+        if is_network_path(current_db_path):
             print("=" * 80)
             print("⚠️  ATENÇÃO: USANDO BANCO DE DADOS EM REDE")
             print(f"📂 Caminho: {current_db_path}")
@@ -10166,7 +10960,6 @@ class MainWindow(QMainWindow):
         try:
             import tempfile
             from core.config import get_database_path
-            import shutil
             
             # Obtém o caminho do banco atual
             try:
@@ -10179,9 +10972,10 @@ class MainWindow(QMainWindow):
             os.makedirs(share_dir, exist_ok=True)
             
             # Copia o banco de dados atual para a pasta compartilhada
+            # (snapshot consistente: o .db em uso pode ter commits ainda no -wal)
             dest_db = os.path.join(share_dir, "confeitaria.db")
             if os.path.exists(current_db) and current_db != dest_db:
-                shutil.copy2(current_db, dest_db)
+                _sqlite_snapshot(current_db, dest_db)
             elif not os.path.exists(dest_db):
                 # Se não existe banco, cria um vazio
                 import sqlite3
@@ -10363,16 +11157,15 @@ class MainWindow(QMainWindow):
                 
             import zipfile
             with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as z:
-                # Adiciona o banco de dados principal
-                z.write(current_db_path, arcname=os.path.basename(current_db_path))
-                
-                # Adiciona arquivos WAL e SHM (se existirem)
-                wal_path = current_db_path + "-wal"
-                shm_path = current_db_path + "-shm"
-                if os.path.isfile(wal_path):
-                    z.write(wal_path, arcname=os.path.basename(wal_path))
-                if os.path.isfile(shm_path):
-                    z.write(shm_path, arcname=os.path.basename(shm_path))
+                # Snapshot consistente do banco (já inclui o conteúdo do WAL);
+                # copiar o .db/-wal/-shm em uso pode gerar um backup inconsistente
+                snapshot_path = path + ".db.tmp"
+                try:
+                    _sqlite_snapshot(current_db_path, snapshot_path)
+                    z.write(snapshot_path, arcname=os.path.basename(current_db_path))
+                finally:
+                    if os.path.exists(snapshot_path):
+                        os.remove(snapshot_path)
                 
                 # Adiciona config.yaml (se existir)
                 config_path = os.path.join(os.path.dirname(current_db_path), "config.yaml")
@@ -10403,7 +11196,7 @@ class MainWindow(QMainWindow):
                 current_db_path = get_database_path()
                 
                 # Verifica se é caminho de rede
-                if current_db_path.startswith('\\\\') or (len(current_db_path) > 1 and current_db_path[1] == ':' and ord(current_db_path[0].upper()) > ord('C')):
+                if is_network_path(current_db_path):
                     print(f"[Backup] 🌐 Banco de dados em REDE detectado: {current_db_path}")
                 else:
                     print(f"[Backup] 💻 Banco de dados LOCAL: {current_db_path}")
@@ -10434,20 +11227,19 @@ class MainWindow(QMainWindow):
             auto_path = os.path.join(BACKUP_DIR, f"{computer_name}_{db_name}_{timestamp}.zip")
             
             print(f"[Backup] 📦 Criando arquivo ZIP: {auto_path}")
-            print(f"[Backup] 📄 Copiando de: {current_db_path}")
+            print(f"[Backup] 📄 Snapshot de: {current_db_path}")
             
             # Cria o backup ZIP do banco (da rede ou local)
             with zipfile.ZipFile(auto_path, 'w', zipfile.ZIP_DEFLATED) as z:
-                # Adiciona o banco de dados principal
-                z.write(current_db_path, arcname=os.path.basename(current_db_path))
-                
-                # Adiciona arquivos WAL e SHM (se existirem)
-                wal_path = current_db_path + "-wal"
-                shm_path = current_db_path + "-shm"
-                if os.path.isfile(wal_path):
-                    z.write(wal_path, arcname=os.path.basename(wal_path))
-                if os.path.isfile(shm_path):
-                    z.write(shm_path, arcname=os.path.basename(shm_path))
+                # Snapshot consistente do banco (já inclui o conteúdo do WAL);
+                # copiar o .db/-wal/-shm em uso pode gerar um backup inconsistente
+                snapshot_path = auto_path + ".db.tmp"
+                try:
+                    _sqlite_snapshot(current_db_path, snapshot_path)
+                    z.write(snapshot_path, arcname=os.path.basename(current_db_path))
+                finally:
+                    if os.path.exists(snapshot_path):
+                        os.remove(snapshot_path)
                 
                 # Adiciona config.yaml (se existir)
                 config_path = os.path.join(os.path.dirname(current_db_path), "config.yaml")
@@ -10460,9 +11252,9 @@ class MainWindow(QMainWindow):
             # Apenas mostra toast discreto - SEM popup que interrompe o trabalho
             self.show_toast(f"💾 Backup automático concluído ({timestamp})")
             
-            # Envia para GitHub (tanto o ZIP quanto o .db original)
+            # Envia o ZIP para o GitHub
             print(f"[Backup] ☁️ Iniciando envio para GitHub...")
-            self._backup_to_github(auto_path, current_db_path)
+            self._backup_to_github(auto_path)
             
         except Exception as e:
             # Silenciosamente registra erro sem interromper o usuário
@@ -10475,12 +11267,11 @@ class MainWindow(QMainWindow):
             except Exception:
                 pass
 
-    def _backup_to_github(self, backup_file: str, source_db_path: str) -> None:
+    def _backup_to_github(self, backup_file: str) -> None:
         """Envia o backup para o repositório GitHub de forma assíncrona.
         
         Args:
-            backup_file: Caminho completo do arquivo de backup ZIP
-            source_db_path: Caminho do banco de dados original (pode ser rede ou local)
+            backup_file: Caminho completo do arquivo de backup ZIP (já traz o banco)
         """
         import subprocess
         import threading
@@ -10488,27 +11279,12 @@ class MainWindow(QMainWindow):
         def upload_backup():
             try:
                 # Verifica se Git está instalado
-                try:
-                    git_check = subprocess.run(
-                        ["git", "--version"],
-                        capture_output=True,
-                        text=True,
-                        timeout=5,
-                        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
-                    )
-                    if git_check.returncode != 0:
-                        print("[GitHub] ❌ Git não está instalado no sistema")
-                        print("[GitHub] ℹ️ Instale o Git para habilitar backup em nuvem")
-                        print("[GitHub] 📥 Download: https://git-scm.com/download/win")
-                        return
-                    print(f"[GitHub] ✅ Git detectado: {git_check.stdout.strip()}")
-                except FileNotFoundError:
-                    print("[GitHub] ❌ Git não encontrado no PATH do sistema")
+                if not _has_cmd("git"):
+                    print("[GitHub] ❌ Git não encontrado no sistema")
+                    print("[GitHub] ℹ️ Instale o Git para habilitar backup em nuvem")
+                    print("[GitHub] 📥 Download: https://git-scm.com/download/win")
                     print("[GitHub] ℹ️ Backup local salvo em:", BACKUP_DIR)
                     return
-                except subprocess.TimeoutExpired:
-                    print("[GitHub] ⏱️ Timeout ao verificar Git")
-                    return
                 
                 # Diretório do repositório de backup
                 backup_repo_dir = os.path.join(base_dir, "Backup_Clientes")
@@ -10517,8 +11293,10 @@ class MainWindow(QMainWindow):
                 if not os.path.exists(backup_repo_dir):
                     print("[GitHub] 📥 Clonando repositório de backup...")
                     print("[GitHub] ℹ️ Isso pode levar alguns minutos na primeira vez...")
+                    # Clone raso: só o último commit, sem o histórico de backups antigos
                     result = subprocess.run(
-                        ["git", "clone", "git@github.com:W4lterBr/Backup_Clientes.git", backup_repo_dir],
+                        ["git", "clone", "--depth=1", "--filter=blob:none", "--no-tags",
+                         "git@github.com:W4lterBr/Backup_Clientes.git", backup_repo_dir],
                         capture_output=True,
                         text=True,
                         timeout=60,  # Aumentado para 60 segundos
@@ -10535,39 +11313,19 @@ class MainWindow(QMainWindow):
                         return
                     print("[GitHub] ✅ Repositório clonado com sucesso")
                 else:
-                    # Pull para garantir que está atualizado
+                    # Sincroniza (raso) para garantir que está atualizado
                     print("[GitHub] 🔄 Atualizando repositório local...")
-                    pull_result = subprocess.run(
-                        ["git", "pull", "origin", "main"],
-                        cwd=backup_repo_dir,
-                        capture_output=True,
-                        text=True,
-                        timeout=30,
-                        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
-                    )
-                    if pull_result.returncode != 0:
-                        print(f"[GitHub] ⚠️ Aviso ao atualizar: {pull_result.stderr}")
-                        # Continua mesmo se o pull falhar
-                
-                # Usa o caminho do banco passado como parâmetro (garante usar o da rede se foi selecionado)
-                import shutil
-                timestamp_db = datetime.now().strftime("%d-%m-%Y")
-                db_backup_name = f"Confeitaria_Backup_{timestamp_db}.db"
-                db_dest_path = os.path.join(backup_repo_dir, db_backup_name)
-                
-                # Copia o arquivo .db DIRETO da fonte (rede ou local)
-                if os.path.isfile(source_db_path):
-                    print(f"[GitHub] 📄 Copiando banco de dados DA FONTE: {source_db_path}")
-                    shutil.copy2(source_db_path, db_dest_path)
-                    db_size = os.path.getsize(db_dest_path) / 1024  # KB
-                    print(f"[GitHub] ✅ Banco de dados copiado: {db_backup_name} ({db_size:.2f} KB)")
-                else:
-                    print(f"[GitHub] ⚠️ Banco de dados não encontrado: {source_db_path}")
-                
-                # Copia o backup ZIP também
+                    synced, sync_err = _git_shallow_sync(backup_repo_dir)
+                    if not synced:
+                        print(f"[GitHub] ⚠️ Aviso ao atualizar: {sync_err}")
+                        # Continua mesmo se a atualização falhar
+                
+                # Só o ZIP vai para o git: ele já contém o banco. Uma cópia crua do
+                # .db duplicaria o conteúdo a cada push e, com o banco em WAL,
+                # perderia os commits que ainda estão no -wal.
                 backup_filename = os.path.basename(backup_file)
                 zip_dest_path = os.path.join(backup_repo_dir, backup_filename)
-                shutil.copy2(backup_file, zip_dest_path)
+                _fast_copy(backup_file, zip_dest_path)
                 zip_size = os.path.getsize(zip_dest_path) / 1024  # KB
                 print(f"[GitHub] ✅ Arquivo ZIP copiado: {backup_filename} ({zip_size:.2f} KB)")
                 
@@ -10578,7 +11336,7 @@ class MainWindow(QMainWindow):
                 subprocess.run(["git", "config", "user.email", "backup@confeitaria.local"], 
                              cwd=backup_repo_dir, capture_output=True,
                              creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0)
-                subprocess.run(["git", "add", db_backup_name, backup_filename], 
+                subprocess.run(["git", "add", backup_filename], 
                              cwd=backup_repo_dir, capture_output=True,
                              creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0)
                 
@@ -10824,7 +11582,7 @@ QPushButton#IconButton:pressed {
     border: 1px solid #4a5480 !important; 
 }
 
-QTableWidget { 
+QTableWidget, QTableView#DataTable { 
     background: #0f1422; 
     alternate-background-color: #0b1020; 
     color: #ffffff; 
@@ -10832,15 +11590,15 @@ QTableWidget {
     border: 1px solid #2c3550;
     border-radius: 4px;
 }
-QTableWidget::item {
+QTableWidget::item, QTableView#DataTable::item {
     padding: 8px;
     color: #ffffff;
 }
-QTableWidget::item:selected {
+QTableWidget::item:selected, QTableView#DataTable::item:selected {
     background: #2a2f43;
     color: #ffffff;
 }
-QTableWidget::item:hover {
+QTableWidget::item:hover, QTableView#DataTable::item:hover {
     background: #1e3a5f;
 }
 QHeaderView::section { 
@@ -11140,7 +11898,7 @@ QPushButton#IconButton:pressed {
     border: 1px solid #a5b4fc !important; 
 }
 
-QTableWidget { 
+QTableWidget, QTableView#DataTable { 
     background: #ffffff; 
     alternate-background-color: #f8fafc; 
     color: #111827; 
@@ -11148,15 +11906,15 @@ QTableWidget {
     border: 1px solid #e5e7eb;
     border-radius: 4px;
 }
-QTableWidget::item {
+QTableWidget::item, QTableView#DataTable::item {
     padding: 8px;
     color: #111827;
 }
-QTableWidget::item:selected {
+QTableWidget::item:selected, QTableView#DataTable::item:selected {
     background: #e8eefc;
     color: #1b2240;
 }
-QTableWidget::item:hover {
+QTableWidget::item:hover, QTableView#DataTable::item:hover {
     background: #dbeafe;
 }
 QHeaderView::section { 
@@ -11445,6 +12203,37 @@ QDialog QPushButton:hover, QMessageBox QPushButton:hover { background-color: #db
 # -----------------------------
 # App bootstrap
 # -----------------------------
+def _restart_process(win: Optional[QWidget], *dbs: Any) -> None:
+    """Relança o aplicativo depois que o loop de eventos de main() terminou.
+    
+    Fecha as janelas (DatabaseDialog.done espera o DbStatusProbe e o
+    GitFetchWorker e fecha a conexão de status), aguarda a escrita da lista
+    da cozinha e fecha as conexões SQLite; só então substitui o processo
+    (POSIX, os.execv) ou inicia o novo (Windows).
+    """
+    QApplication.closeAllWindows()
+    page = getattr(win, "page_production", None)
+    writer = getattr(page, "_kitchen_writer", None)
+    if writer is not None:
+        writer.wait(5000)
+    for db in (getattr(win, "db", None), *dbs):
+        conn = getattr(db, "conn", None)
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+    
+    # PyInstaller: só o .exe; desenvolvimento: python script.py
+    args = [sys.executable] if getattr(sys, "frozen", False) else [sys.executable, sys.argv[0]]
+    sys.stdout.flush()
+    sys.stderr.flush()
+    if sys.platform != 'win32':
+        os.execv(sys.executable, args)
+    subprocess.Popen(args, creationflags=subprocess.CREATE_NEW_CONSOLE)
+    print("Novo processo iniciado. Fechando aplicação atual...")
+
+
 def main() -> None:
     # =====================================================================
     # FORÇAR UTF-8 NO WINDOWS PARA EVITAR ERROS COM EMOJIS
@@ -11765,8 +12554,15 @@ def main() -> None:
     base_qss = qss_dark() if theme == 'dark' else qss_light()
     # Aplicar apenas o CSS base, sem concatenação adicional
     app.setStyleSheet(base_qss)
+    win.current_theme = theme
     win.show()
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    if app.property("restart_requested"):
+        try:
+            _restart_process(win, db)
+        except Exception as e:
+            log_error("Não foi possível reiniciar automaticamente", e)
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
     main()
@@ -2,10 +2,12 @@
 # Configurações globais e leitura de YAML
 
 from typing import Dict, Any, Optional
+import copy
 import yaml
 import os
 import sys
 from PyQt6.QtWidgets import QWidget, QFileDialog
+from core.database import is_network_path
 
 def get_app_data_directory() -> str:
     """
@@ -35,6 +37,11 @@ _DATA_DIR = get_app_data_directory()
 # Caminho para o arquivo de configuração
 _CONFIG_PATH = os.path.join(_DATA_DIR, 'config.yaml')
 
+# Cache do último YAML lido: chave (mtime_ns, tamanho) -> dicionário.
+# Evita reparsear o arquivo a cada abertura de diálogo; save_config invalida.
+_config_cache_key: Optional[tuple[int, int]] = None
+_config_cache: Dict[str, Any] = {}
+
 # QSS para popups escuros (contraste garantido)
 QSS_POPUP_DARK = """
 QDialog, QMessageBox, QFileDialog, QInputDialog {
@@ -281,10 +288,18 @@ def load_config() -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: Dicionário com as configurações
     """
-    if not os.path.exists(_CONFIG_PATH):
+    global _config_cache_key, _config_cache
+    try:
+        st = os.stat(_CONFIG_PATH)
+    except OSError:
         return {}
-    with open(_CONFIG_PATH, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f) or {}
+    key = (st.st_mtime_ns, st.st_size)
+    if key != _config_cache_key:
+        with open(_CONFIG_PATH, 'r', encoding='utf-8') as f:
+            _config_cache = yaml.safe_load(f) or {}
+        _config_cache_key = key
+    # Cópia para que o chamador possa alterar e salvar sem sujar o cache
+    return copy.deepcopy(_config_cache)
 
 def save_config(data: Dict[str, Any]) -> None:
     """
@@ -293,8 +308,10 @@ def save_config(data: Dict[str, Any]) -> None:
     Args:
         data: Dicionário com as configurações para salvar
     """
+    global _config_cache_key
     with open(_CONFIG_PATH, 'w', encoding='utf-8') as f:
         yaml.safe_dump(data, f, allow_unicode=True)
+    _config_cache_key = None
 
 def get_database_path() -> str:
     """
@@ -311,7 +328,7 @@ def get_database_path() -> str:
     user_db_path = get_user_database_path()
     if user_db_path:
         # Se é caminho de rede, mostra aviso
-        if user_db_path.startswith('\\\\') or (len(user_db_path) > 1 and user_db_path[1] == ':' and ord(user_db_path[0].upper()) > ord('C')):
+        if is_network_path(user_db_path):
             print(f"Banco de dados configurado encontrado: {user_db_path}")
             print("⚠️ ATENÇÃO: Usando banco de dados em REDE")
             print("   Todas as operações (incluindo backup) usarão o arquivo da rede")
@@ -379,6 +396,14 @@ def set_database_path(path: str) -> bool:
         try:
             import sqlite3
             conn = sqlite3.connect(path)
+            # WAL fica gravado no cabeçalho do banco: basta ativar uma vez aqui.
+            # Na rede (UNC ou unidade mapeada) usa TRUNCATE (WAL exige memória
+            # compartilhada local e é mais lento em compartilhamento de rede);
+            # isso também desfaz um WAL deixado por uso local anterior.
+            if is_network_path(path):
+                conn.execute("PRAGMA journal_mode=TRUNCATE")
+            else:
+                conn.execute("PRAGMA journal_mode=WAL")
             conn.close()
         except Exception as e:
             print(f"Erro ao validar banco de dados: {e}")
@@ -2,24 +2,79 @@
 # Responsável pela conexão e operações com o banco de dados SQLite
 
 import sqlite3
-from typing import Any, List, Tuple, Union, Mapping
+import sys
+from typing import Any, List, Optional, Tuple, Union, Mapping
 
 # Parameter type accepted by sqlite3 (positional tuple or named mapping)
 Params = Union[Tuple[Any, ...], Mapping[str, Any]]
 
+_DRIVE_REMOTE = 4  # GetDriveTypeW: unidade de rede
+
+def drive_is_remote(drive_letter: str) -> Optional[bool]:
+    """GetDriveTypeW da letra (Windows): True se for unidade de rede; None se indisponível"""
+    if sys.platform != 'win32':
+        return None
+    try:
+        import ctypes
+        return ctypes.windll.kernel32.GetDriveTypeW(f"{drive_letter.upper()}:\\") == _DRIVE_REMOTE
+    except Exception:
+        return None
+
+def is_network_path(path: str) -> bool:
+    """Detecta se o caminho está na rede: UNC (\\\\servidor\\..., //servidor/...) ou unidade mapeada.
+    
+    Teste único usado pela configuração, pelo Database e pelo status do banco
+    para escolher/conferir o journal_mode (TRUNCATE na rede, WAL local).
+    """
+    if not path:
+        return False
+    
+    # UNC path (\\servidor\compartilhamento)
+    if path.startswith(('\\\\', '//')):
+        return True
+    
+    # Verificar se é unidade mapeada (Windows)
+    if sys.platform == 'win32' and len(path) >= 2 and path[1] == ':':
+        # Chamada direta à API; "net use" só se ela falhar
+        remote = drive_is_remote(path[0])
+        if remote is not None:
+            return remote
+        try:
+            import subprocess
+            drive_letter = path[0].upper()
+            result = subprocess.run(['net', 'use'], capture_output=True, text=True, timeout=2)
+            if result.returncode == 0 and drive_letter in result.stdout:
+                return True
+        except Exception:
+            pass
+    
+    return False
+
 class Database:
     def __init__(self, db_path: str):
         self.db_path = db_path
         # Conexão com configurações mais seguras para concorrência (multi-processo)
         # check_same_thread=False permite uso pelo Qt em threads diferentes da principal (quando necessário)
         # timeout define quanto esperar em locks antes de falhar
-        self.conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        # cached_statements: cache maior de statements preparados (consultas repetidas do auto-refresh)
+        self.conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False, cached_statements=256)
         self.conn.row_factory = sqlite3.Row
-        # PRAGMAs para melhorar concorrência e integridade
+        # PRAGMAs para melhorar concorrência e integridade.
+        # WAL: leituras (auto-refresh) não bloqueiam escritas e cada commit só anexa ao log,
+        # sem regravar um journal de rollback; synchronous=NORMAL dispensa fsync por commit.
+        # O SQLite mantém os arquivos "<banco>-wal" e "<banco>-shm" ao lado do .db enquanto
+        # houver conexões abertas. Não copie esses arquivos com o banco em uso: backups
+        # usam a API de backup online (_sqlite_snapshot), que gera um único .db consistente.
         try:
             c = self.conn.cursor()
             c.execute("PRAGMA foreign_keys=ON")
-            c.execute("PRAGMA journal_mode=WAL")  # leitores não bloqueiam escritor
+            if is_network_path(db_path):
+                # Em compartilhamento de rede (UNC ou unidade mapeada) o WAL não é
+                # suportado: o -shm depende de memória compartilhada local. TRUNCATE
+                # evita recriar o arquivo de journal a cada transação.
+                c.execute("PRAGMA journal_mode=TRUNCATE")
+            else:
+                c.execute("PRAGMA journal_mode=WAL")  # leitores não bloqueiam escritor
             c.execute("PRAGMA synchronous=NORMAL")
             c.execute("PRAGMA busy_timeout=5000")  # 5s de espera em lock
             c.execute("PRAGMA temp_store=MEMORY")
@@ -1,7 +1,7 @@
 # dashboard.py
 # Dashboard com gráficos e KPIs
 
-from typing import Any, List, cast
+from typing import Any, List, Tuple, cast
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QHBoxLayout
 from PyQt6.QtCharts import QChart, QChartView, QBarSeries, QBarSet, QBarCategoryAxis, QValueAxis
 from PyQt6.QtGui import QPainter
@@ -13,6 +13,8 @@ class Dashboard(QWidget):
         super().__init__()
         self.db: Database = db
         self.db = db
+        # Mês e marcador de escrita no banco (total_changes, data_version) da última atualização
+        self._last_refresh_key: Tuple[str, Tuple[int, int]] = ("", (-1, -1))
         layout = QVBoxLayout(self)
 
         # KPIs
@@ -32,21 +34,28 @@ class Dashboard(QWidget):
 
         self.refresh()
 
+    def _db_change_token(self) -> Tuple[int, int]:
+        """(total_changes, data_version): muda a cada escrita desta conexão ou de qualquer outra"""
+        conn = self.db.conn
+        return conn.total_changes, conn.execute("PRAGMA data_version").fetchone()[0]
+
     def refresh(self):
         from datetime import date
         today = date.today()
         ym = today.strftime("%Y-%m")
-        sales = cast(List[Any], self.db.query(
-            "SELECT SUM(total) AS s FROM orders WHERE substr(created_at,1,7)=? AND status = ?",
+        # Mesmo mês e sem escritas desde a última atualização: KPIs e gráfico continuam válidos
+        key = (ym, self._db_change_token())
+        if key == self._last_refresh_key:
+            return
+        self._last_refresh_key = key
+        # Faturamento e quantidade de pedidos pagos do mês numa única consulta
+        month = cast(List[Any], self.db.query(
+            "SELECT COALESCE(SUM(total),0) AS s, COUNT(*) AS c FROM orders WHERE substr(created_at,1,7)=? AND status = ?",
             (ym, "Pago")
         ))
-        sales_val = cast(float, sales[0]["s"]) if sales[0]["s"] is not None else 0
+        sales_val = cast(float, month[0]["s"])
         self.lbl_kpi_sales.setText(f"Vendas do mês: R$ {sales_val:,.2f}".replace(",","X").replace(".",",").replace("X","."))
-        orders_count = cast(List[Any], self.db.query(
-            "SELECT COUNT(*) AS c FROM orders WHERE substr(created_at,1,7)=? AND status = ?",
-            (ym, "Pago")
-        ))
-        self.lbl_kpi_orders.setText(f"Pedidos do mês: {orders_count[0]['c']}")
+        self.lbl_kpi_orders.setText(f"Pedidos do mês: {month[0]['c']}")
         # Alerta de estoque baixo
         low = cast(List[Any], self.db.query("SELECT name, stock FROM products WHERE stock <= min_stock AND min_stock > 0 ORDER BY name"))
         if low: